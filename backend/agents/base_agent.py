@@ -1,11 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
-from openai import OpenAI, RateLimitError, APIError
+import asyncio
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+from openai import AsyncOpenAI, RateLimitError, APIError
+from openai.types.chat import ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
 import os
 from datetime import datetime
 import json
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import orjson
+import random
+
+from .conversation_store import ConversationStore
+from .llm_client import LLMBatcher, prewarm_client
+from .response_cache import ResponseCache, make_cache_key, normalize_prompt
 
 # Add basic logging
 logging.basicConfig(level=logging.INFO)
@@ -14,32 +22,80 @@ logger = logging.getLogger(__name__)
 class BaseAgent(ABC):
     """Base class for all agents in the system"""
     
-    def __init__(self, name: str, model: str = "gpt-4o-mini"):
+    def __init__(self, name: str, model: str = "gpt-4o-mini", response_cache_ttl: float = 3600.0):
         self.name = name
         self.model = model
-        self.client: OpenAI
-        self.conversations: Dict[str, List[Dict]] = {}
+        self.client: AsyncOpenAI
         self.max_conversation_length = 20  # Prevent runaway context
+        # Bounded per-conversation history (the deque drops the oldest message once full), LRU-capped
+        # by session count; cold sessions are offloaded to Redis when REDIS_URL is set
+        self.conversations: ConversationStore = ConversationStore(
+            max_sessions=int(os.getenv("MAX_ACTIVE_CONVERSATIONS", "10000")),
+            max_messages=self.max_conversation_length,
+            redis_url=os.getenv("REDIS_URL")
+        )
         self.max_tool_calls = 5 
+        self.max_api_attempts = 3  # Completion attempts before a rate limit / API error is raised
+        # Approximate prompt budget for history (the message-count cap above still applies)
+        self.max_prompt_tokens = int(os.getenv("MAX_PROMPT_TOKENS", "6000"))
+        # Stable prefix cache key for providers that support explicit prompt caching (e.g. OpenAI)
+        self.prompt_cache_key: Optional[str] = None
+        # Cache of final answers keyed by (system prompt, history, user message); a TTL of 0 disables it
+        self.response_cache = ResponseCache(ttl=response_cache_ttl) if response_cache_ttl > 0 else None
+        # Optional SemanticCache for paraphrased opening questions (set by subclasses that enable it)
+        self.semantic_cache = None
+        # Optional LLMBatcher that non-streaming completions go through (set by subclasses that enable it)
+        self.llm_batcher: Optional[LLMBatcher] = None
+        # Built once on first use; see invalidate_prompt_cache()
+        self._system_prompt: Optional[str] = None
+        self._tools: Optional[List[Dict]] = None
         
     @abstractmethod
-    def get_system_prompt(self) -> str:
-        """Return the system prompt for this agent"""
+    def _build_system_prompt(self) -> str:
+        """Build the system prompt for this agent (called once, then cached)"""
         pass
     
     @abstractmethod
+    def _build_tools(self) -> List[Dict]:
+        """Build the tools available to this agent (called once, then cached)"""
+        pass
+    
+    def get_system_prompt(self) -> str:
+        """Return the system prompt for this agent"""
+        if self._system_prompt is None:
+            self._system_prompt = self._build_system_prompt()
+        return self._system_prompt
+    
     def get_tools(self) -> List[Dict]:
         """Return the tools available to this agent"""
-        pass
+        if self._tools is None:
+            self._tools = self._build_tools()
+        return self._tools
+    
+    def invalidate_prompt_cache(self):
+        """Drop the cached system prompt and tools so they are rebuilt after a config change"""
+        self._system_prompt = None
+        self._tools = None
+    
+    async def prewarm(self):
+        """Open the LLM connection and build the prompt/tools ahead of the first user message"""
+        self.get_system_prompt()
+        self.get_tools()
+        await prewarm_client(self.client)
+    
+    async def close(self):
+        """Flush pending conversation offloads and release the conversation store's connections"""
+        await self.conversations.close()
     
     async def process_message(self, message: str, conversation_id: str) -> Dict[str, Any]:
         """Process a user message and return a response"""
+        timestamp = datetime.now().isoformat()  # One clock read per turn, shared by every return path
         try:
             # Add input validation
             if not message or not message.strip():
                 return {
                     "message": "Message cannot be empty",
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": timestamp,
                     "agent": self.name,
                     "error": True
                 }
@@ -47,14 +103,25 @@ class BaseAgent(ABC):
             if not conversation_id:
                 return {
                     "message": "Conversation ID is required",
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": timestamp,
                     "agent": self.name,
                     "error": True
                 }
             
-            # Initialize conversation if new
-            if conversation_id not in self.conversations:
-                self.conversations[conversation_id] = []
+            # Initialize conversation if new (or rehydrate an offloaded one)
+            await self.conversations.load(conversation_id)
+            
+            # Serve repeated turns (same prompt, history and message) from the response cache
+            cached_message, cache_key, query_vector = await self._lookup_cached_answer(conversation_id, message)
+            if cached_message:
+                logger.debug(f"[{self.name}] Response cache hit for conversation {conversation_id}")
+                self.conversations[conversation_id].append({"role": "user", "content": message.strip()})
+                self.conversations[conversation_id].append({"role": "assistant", "content": cached_message})
+                return {
+                    "message": cached_message,
+                    "timestamp": timestamp,
+                    "agent": self.name
+                }
             
             # Add user message to conversation
             self.conversations[conversation_id].append({
@@ -62,13 +129,12 @@ class BaseAgent(ABC):
                 "content": message.strip()  # Strip whitespace
             })
             
-            # Manage conversation length
-            self._manage_conversation_length(conversation_id)
+            # Keep the prompt within the token budget
+            self._trim_history(conversation_id)
             
             # Build messages for API call
-            messages = [
-                {"role": "system", "content": self.get_system_prompt()}
-            ] + self.conversations[conversation_id]
+            messages = [{"role": "system", "content": self.get_system_prompt()}]
+            messages.extend(self.conversations[conversation_id])
             
             # Get tools for this agent
             tools = self.get_tools()
@@ -82,9 +148,12 @@ class BaseAgent(ABC):
                 "content": final_message or "I understand your request."  # Handle None
             })
             
+            if final_message:
+                self._store_answer(cache_key, query_vector, final_message)
+            
             return {
                 "message": final_message or "I understand your request.",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "agent": self.name
             }
             
@@ -93,117 +162,316 @@ class BaseAgent(ABC):
             logger.error(f"[{self.name}] {error_message}")  # Add logging
             return {
                 "message": error_message,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "agent": self.name,
                 "error": True
             }
     
-    @retry(
-        retry=retry_if_exception_type((RateLimitError, APIError)),
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
-    )
+    async def stream_message(self, message: str, conversation_id: str) -> AsyncIterator[str]:
+        """Process a user message and yield only the response text as it is generated (see stream_events)"""
+        async for event in self.stream_events(message, conversation_id):
+            if event["type"] == "delta":
+                yield event["content"]
+    
+    async def stream_events(self, message: str, conversation_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a user message and yield events as the response is generated:
+        {"type": "delta", "content": ...} for response text, and
+        {"type": "tool_call", "name": ..., "arguments": ...} as each tool call is dispatched.
+        
+        Tool calls requested by the model are buffered until the first stream ends,
+        executed, and the final answer is then streamed from a second completion.
+        Non-streaming callers should keep using process_message.
+        """
+        if not message or not message.strip():
+            yield {"type": "delta", "content": "Message cannot be empty"}
+            return
+        
+        if not conversation_id:
+            yield {"type": "delta", "content": "Conversation ID is required"}
+            return
+        
+        # Initialize conversation if new (or rehydrate an offloaded one)
+        await self.conversations.load(conversation_id)
+        
+        # Serve repeated turns from the response cache in one chunk
+        cached_message, cache_key, query_vector = await self._lookup_cached_answer(conversation_id, message)
+        if cached_message:
+            logger.debug(f"[{self.name}] Response cache hit for conversation {conversation_id}")
+            self.conversations[conversation_id].append({"role": "user", "content": message.strip()})
+            self.conversations[conversation_id].append({"role": "assistant", "content": cached_message})
+            yield {"type": "delta", "content": cached_message}
+            return
+        
+        self.conversations[conversation_id].append({
+            "role": "user",
+            "content": message.strip()
+        })
+        
+        self._trim_history(conversation_id)
+        
+        messages = [{"role": "system", "content": self.get_system_prompt()}]
+        messages.extend(self.conversations[conversation_id])
+        tools = self.get_tools()
+        
+        request_kwargs = {"tools": tools, "tool_choice": "auto"} if tools else {}
+        stream = await self._create_completion(
+            conversation_id,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=1500,
+            stream=True,
+            **request_kwargs
+        )
+        
+        content_parts: List[str] = []
+        pending_tool_calls: Dict[int, Dict[str, str]] = {}
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content_parts.append(delta.content)
+                yield {"type": "delta", "content": delta.content}
+            # Tool call deltas arrive in fragments keyed by index; stitch them back together
+            for tool_delta in delta.tool_calls or []:
+                buffered = pending_tool_calls.setdefault(tool_delta.index, {"id": "", "name": "", "arguments": ""})
+                if tool_delta.id:
+                    buffered["id"] = tool_delta.id
+                if tool_delta.function:
+                    buffered["name"] += tool_delta.function.name or ""
+                    buffered["arguments"] += tool_delta.function.arguments or ""
+        
+        if pending_tool_calls:
+            tool_calls = [
+                ChatCompletionMessageToolCall(
+                    id=buffered["id"],
+                    type="function",
+                    function=Function(name=buffered["name"], arguments=buffered["arguments"])
+                )
+                for _, buffered in sorted(pending_tool_calls.items())
+            ][:self.max_tool_calls]
+            
+            # Let the client show progress ("Looking up PS11752778...") while the tools run
+            for tool_call in tool_calls:
+                yield {"type": "tool_call", "name": tool_call.function.name, "arguments": tool_call.function.arguments}
+            
+            tool_results = await self._process_tool_calls(tool_calls)
+            
+            tool_call_turn = {
+                "role": "assistant",
+                "content": "".join(content_parts),
+                "tool_calls": [tc.model_dump() for tc in tool_calls]
+            }
+            self.conversations[conversation_id].append(tool_call_turn)
+            self.conversations[conversation_id].extend(tool_results)
+            
+            # Stream the final answer, extending the hop-1 messages as in _make_api_call_with_retry
+            content_parts = []
+            messages.append(tool_call_turn)
+            messages.extend(tool_results)
+            final_stream = await self._create_completion(
+                conversation_id,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1500,
+                stream=True
+            )
+            async for chunk in final_stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    content_parts.append(chunk.choices[0].delta.content)
+                    yield {"type": "delta", "content": chunk.choices[0].delta.content}
+        
+        final_message = "".join(content_parts)
+        if not final_message:
+            final_message = "I understand your request."
+            yield {"type": "delta", "content": final_message}
+        
+        self.conversations[conversation_id].append({
+            "role": "assistant",
+            "content": final_message
+        })
+        
+        self._store_answer(cache_key, query_vector, final_message)
+    
+    async def _lookup_cached_answer(self, conversation_id: str, message: str) -> Tuple[Optional[str], Optional[str], Any]:
+        """
+        Look a turn up in the response cache and, for opening questions, the semantic cache.
+        Returns (cached answer or None, response cache key, query embedding) for _store_answer.
+        """
+        history = self.conversations[conversation_id]
+        normalized = normalize_prompt(message)
+        
+        cache_key = None
+        if self.response_cache:
+            cache_key = make_cache_key(self.get_system_prompt(), list(history), normalized)
+            cached_message = self.response_cache.get(cache_key)
+            if cached_message:
+                return cached_message, cache_key, None
+        
+        # Paraphrases are only matched for opening questions, whose meaning doesn't depend on earlier turns,
+        # and never for ones naming a part or model number (a near-identical question about another part
+        # must not get this one's answer)
+        query_vector = None
+        if self.semantic_cache and not history and self.semantic_cache.accepts(normalized):
+            query_vector = await self.semantic_cache.embed(normalized)
+            if query_vector is not None:
+                cached_message = self.semantic_cache.get(query_vector)
+                if cached_message:
+                    if cache_key:
+                        self.response_cache.set(cache_key, cached_message)
+                    return cached_message, cache_key, query_vector
+        
+        return None, cache_key, query_vector
+    
+    def _store_answer(self, cache_key: Optional[str], query_vector: Any, answer: str) -> None:
+        """Store a fresh answer in the response cache and, if it was embedded, the semantic cache"""
+        if cache_key:
+            self.response_cache.set(cache_key, answer)
+        if query_vector is not None:
+            self.semantic_cache.set(query_vector, answer)
+    
     async def _make_api_call_with_retry(self, messages: List[Dict], tools: List[Dict], conversation_id: str) -> str:
         """Make API call with retry logic"""
-        try:
-            if tools:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    tools=tools,
-                    tool_choice="auto",
-                    temperature=0.7,
-                    max_tokens=1500  # Add token limit
-                )
-            else:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.7,
-                    max_tokens=1500
-                )
+        request_kwargs = {"tools": tools, "tool_choice": "auto"} if tools else {}
+        response = await self._create_completion(
+            conversation_id,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=1500,  # Add token limit
+            **request_kwargs
+        )
+        
+        # Handle tool calls if any
+        assistant_message = response.choices[0].message
+        
+        if hasattr(assistant_message, 'tool_calls') and assistant_message.tool_calls:
+            # Limit tool calls to prevent loops
+            tool_calls = assistant_message.tool_calls[:self.max_tool_calls]
             
-            # Handle tool calls if any
-            assistant_message = response.choices[0].message
-            
-            if hasattr(assistant_message, 'tool_calls') and assistant_message.tool_calls:
-                # Limit tool calls to prevent loops
-                tool_calls = assistant_message.tool_calls[:self.max_tool_calls]
-                
-                # Process tool calls
-                tool_results = await self._process_tool_calls(tool_calls)
-                
-                # Add assistant message with tool calls to conversation
-                self.conversations[conversation_id].append({
-                    "role": "assistant",
-                    "content": assistant_message.content or "",
-                    "tool_calls": [tc.model_dump() for tc in tool_calls]
-                })
-                
-                # Add tool results to conversation
-                for tool_result in tool_results:
-                    self.conversations[conversation_id].append(tool_result)
-                
-                # Get final response after tool execution
-                final_response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "system", "content": self.get_system_prompt()}] + 
-                             self.conversations[conversation_id],
-                    temperature=0.7,
-                    max_tokens=1500
-                )
-                
-                final_message = final_response.choices[0].message.content
-            else:
-                final_message = assistant_message.content
+            # Process tool calls
+            tool_results = await self._process_tool_calls(tool_calls)
             
-            return final_message or "I understand your request."
+            # Assistant turn with tool calls is built once and shared by the history and hop 2
+            tool_call_turn = {
+                "role": "assistant",
+                "content": assistant_message.content or "",
+                "tool_calls": [tc.model_dump() for tc in tool_calls]
+            }
             
-        except RateLimitError:
-            logger.warning(f"[{self.name}] Rate limit exceeded for conversation {conversation_id}")
-            raise
-        except APIError as e:
-            logger.error(f"[{self.name}] API error for conversation {conversation_id}: {str(e)}")
-            raise
+            # Add assistant message and tool results to conversation
+            self.conversations[conversation_id].append(tool_call_turn)
+            self.conversations[conversation_id].extend(tool_results)
+            
+            # Get final response after tool execution. Hop 2 appends to the same hop-1 messages
+            # list in place rather than re-reading the (possibly trimmed) history, so the
+            # provider's prompt prefix cache matches byte-for-byte and no list is copied
+            messages.append(tool_call_turn)
+            messages.extend(tool_results)
+            final_response = await self._create_completion(
+                conversation_id,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1500
+            )
+            
+            final_message = final_response.choices[0].message.content
+        else:
+            final_message = assistant_message.content
+        
+        return final_message or "I understand your request."
     
-    async def _process_tool_calls(self, tool_calls) -> List[Dict]:
-        """Process tool calls and return results"""
-        results = []
-        for tool_call in tool_calls:
+    async def _create_completion(self, conversation_id: str, **kwargs) -> Any:
+        """
+        Create a chat completion, retrying rate limits and API errors with exponential backoff.
+        
+        Retries wrap each completion call rather than the whole turn, so tools are never
+        re-executed and history is never appended twice when only hop 2 fails.
+        """
+        request = {"model": self.model, **kwargs, **self._prompt_cache_kwargs(conversation_id)}
+        for attempt in range(self.max_api_attempts):
             try:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-                
-                # Execute the tool function
-                result = await self._execute_tool(function_name, function_args)
-                
-                results.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": json.dumps(result, default=str)  # Handle non-serializable objects
-                })
-            except json.JSONDecodeError as e:
-                results.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": json.dumps({"error": f"Invalid JSON in tool arguments: {str(e)}"})
-                })
-            except Exception as e:
-                results.append({
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": json.dumps({"error": f"Tool execution failed: {str(e)}"})
-                })
-        
-        return results
+                if self.llm_batcher is not None and not kwargs.get("stream"):
+                    return await self.llm_batcher.create(**request)
+                return await self.client.chat.completions.create(**request)
+            except RateLimitError:
+                logger.warning(f"[{self.name}] Rate limit exceeded for conversation {conversation_id}")
+                if attempt == self.max_api_attempts - 1:
+                    raise
+            except APIError as e:
+                logger.error(f"[{self.name}] API error for conversation {conversation_id}: {str(e)}")
+                if attempt == self.max_api_attempts - 1:
+                    raise
+            await asyncio.sleep(min(4 * 2 ** attempt, 10) + random.uniform(0, 1))
+    
+    @staticmethod
+    def _estimate_tokens(message: Dict) -> int:
+        """Rough token count for a history message (~4 characters per token)"""
+        chars = len(message.get("content") or "")
+        for tool_call in message.get("tool_calls") or ():
+            chars += len(tool_call["function"]["arguments"])
+        return chars // 4 + 4  # Per-message overhead for role and framing
+    
+    def _trim_history(self, conversation_id: str):
+        """Drop the oldest messages until the history fits in max_prompt_tokens"""
+        history = self.conversations[conversation_id]
+        budget = self.max_prompt_tokens - self._estimate_tokens({"content": self.get_system_prompt()})
+        total = sum(self._estimate_tokens(m) for m in history)
+        
+        # Always keep the latest message, even if it alone is over budget
+        while len(history) > 1 and total > budget:
+            total -= self._estimate_tokens(history.popleft())
+        
+        # Tool results are only valid after the assistant turn that requested them
+        while len(history) > 1 and history[0]["role"] == "tool":
+            history.popleft()
+    
+    def _prompt_cache_kwargs(self, conversation_id: Optional[str] = None) -> Dict[str, Any]:
+        """Extra request arguments that let the provider reuse the cached prompt prefix"""
+        if not self.prompt_cache_key:
+            return {}
+        # Scope the key to the conversation so both hops of a turn land on the same cache entry
+        cache_key = f"{self.prompt_cache_key}:{conversation_id}" if conversation_id else self.prompt_cache_key
+        return {"extra_body": {"prompt_cache_key": cache_key}}
+    
+    async def _process_tool_calls(self, tool_calls) -> List[Dict]:
+        """Process tool calls concurrently and return results in call order"""
+        if len(tool_calls) == 1:
+            # The common single-call turn doesn't need a task per call
+            return [await self._execute_one(tool_calls[0])]
+        return list(await asyncio.gather(*(self._execute_one(tool_call) for tool_call in tool_calls)))
+    
+    async def _execute_one(self, tool_call) -> Dict:
+        """Execute a single tool call and return its tool message (errors are reported, not raised)"""
+        try:
+            function_name = tool_call.function.name
+            function_args = orjson.loads(tool_call.function.arguments)
+            
+            # Execute the tool function
+            result = await self._execute_tool(function_name, function_args)
+            
+            content = self._dump_tool_result(result)
+        except json.JSONDecodeError as e:
+            content = orjson.dumps({"error": f"Invalid JSON in tool arguments: {str(e)}"}).decode()
+        except Exception as e:
+            content = orjson.dumps({"error": f"Tool execution failed: {str(e)}"}).decode()
+        
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": content
+        }
+    
+    @staticmethod
+    def _dump_tool_result(result: Any) -> str:
+        """Serialize a tool result with orjson, falling back to stdlib json for types orjson rejects"""
+        try:
+            return orjson.dumps(result, default=str).decode()
+        except TypeError:
+            # e.g. non-string dict keys or integers wider than 64 bits
+            return json.dumps(result, default=str)  # Handle non-serializable objects
     
     @abstractmethod
     async def _execute_tool(self, function_name: str, function_args: Dict) -> Any:
         """Execute a specific tool function"""
-        pass
-    
-    def _manage_conversation_length(self, conversation_id: str):
-        """Prevent conversations from growing too long"""
-        if len(self.conversations[conversation_id]) > self.max_conversation_length:
-            # Keep last N messages
-            self.conversations[conversation_id] = self.conversations[conversation_id][-self.max_conversation_length:]
\ No newline at end of file
+        pass
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Micro-batching helper for PartSelect agents
+Coalesces requests that arrive within a short window into one handler call
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Collects submitted items and hands them to `handler` in batches.
+
+    A batch is flushed when `max_batch_size` items are pending or `flush_interval`
+    seconds after the first item of the batch arrived, whichever comes first.
+    `handler` receives the list of items and must return one result per item, in order.
+    """
+
+    def __init__(self,
+                 handler: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 8,
+                 flush_interval: float = 0.05):
+        self.handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[asyncio.Future, Any]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()  # Keep references so flushes aren't garbage collected
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((future, item))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._schedule(self._flush())
+        elif self._timer is None:
+            self._timer = self._schedule(self._flush_after_interval())
+
+        return await future
+
+    def _schedule(self, coro: Awaitable[None]) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_after_interval(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        await self._flush()
+
+    async def _flush(self) -> None:
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if not batch:
+            return
+
+        # Anything left over starts the next window
+        if self._pending and self._timer is None:
+            self._timer = self._schedule(self._flush_after_interval())
+
+        try:
+            results = await self.handler([item for _, item in batch])
+        except Exception as e:
+            logger.error(f"Batch handler failed for {len(batch)} items: {str(e)}")
+            for future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(results) != len(batch):
+            error = RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+            for future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
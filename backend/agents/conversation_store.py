@@ -0,0 +1,96 @@
+"""
+Conversation Store for PartSelect agents
+LRU-bounded in-memory conversation histories, with cold sessions optionally offloaded to Redis
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Set
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+class ConversationStore(OrderedDict):
+    """
+    Maps conversation IDs to bounded message deques, keeping at most `max_sessions` in memory.
+
+    When a session is evicted it is written to Redis (if `redis_url` is set) under
+    `conv:{conversation_id}` with a TTL, and `load` rehydrates it on the next turn.
+    Without Redis, evicted sessions are simply dropped.
+    """
+
+    def __init__(self,
+                 max_sessions: int = 10_000,
+                 max_messages: int = 20,
+                 redis_url: Optional[str] = None,
+                 offload_ttl: int = 86400):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.offload_ttl = offload_ttl
+        self._redis = None
+        self._tasks: Set[asyncio.Task] = set()  # Keep references so offload writes aren't garbage collected
+        if redis_url:
+            import redis.asyncio as redis_asyncio
+            self._redis = redis_asyncio.from_url(redis_url)
+            logger.info("Conversation offloading to Redis enabled")
+
+    def __getitem__(self, conversation_id: str) -> Deque[Dict]:
+        history = super().__getitem__(conversation_id)
+        self.move_to_end(conversation_id)
+        return history
+
+    def __setitem__(self, conversation_id: str, history: Deque[Dict]) -> None:
+        super().__setitem__(conversation_id, history)
+        self.move_to_end(conversation_id)
+        while len(self) > self.max_sessions:
+            evicted_id, evicted_history = self.popitem(last=False)
+            self._offload(evicted_id, evicted_history)
+
+    async def load(self, conversation_id: str) -> Deque[Dict]:
+        """Return the history for a conversation, rehydrating it from Redis or creating it if needed"""
+        if conversation_id in self:
+            return self[conversation_id]
+
+        messages = []
+        if self._redis is not None:
+            try:
+                data = await self._redis.get(self._redis_key(conversation_id))
+                if data:
+                    messages = orjson.loads(data)
+            except Exception as e:
+                logger.warning(f"Failed to rehydrate conversation {conversation_id}: {str(e)}")
+
+        history = deque(messages, maxlen=self.max_messages)
+        self[conversation_id] = history
+        return history
+
+    async def close(self) -> None:
+        """Wait for pending offload writes and close the Redis connection"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def _offload(self, conversation_id: str, history: Deque[Dict]) -> None:
+        if self._redis is None or not history:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop to write from; the session is dropped
+        task = loop.create_task(self._write(conversation_id, orjson.dumps(list(history), default=str)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, conversation_id: str, payload: bytes) -> None:
+        try:
+            await self._redis.set(self._redis_key(conversation_id), payload, ex=self.offload_ttl)
+        except Exception as e:
+            logger.warning(f"Failed to offload conversation {conversation_id}: {str(e)}")
+
+    @staticmethod
+    def _redis_key(conversation_id: str) -> str:
+        return f"conv:{conversation_id}"
@@ -1,14 +1,143 @@
 import os
 import json
 import logging
+import orjson
+import re
 from typing import Dict, Any, List, Optional, Tuple
-from openai import OpenAI
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
+from pydantic import ValidationError
+
+from .batching import MicroBatcher
+from .llm_client import get_async_client
+from .response_cache import ResponseCache, make_cache_key
+from .structured_outputs import GuardrailEvaluation, GuardrailBatchEvaluation, GuardrailTriage
 
 logger = logging.getLogger(__name__)
 
+# Local pre-filter: PartSelect-style part IDs and phrases that always need a full evaluation
+_PART_ID_RE = re.compile(r'\b(?:PS|WP|W)\d{6,}\b')
+_UNSAFE_PHRASES = frozenset({
+    "bypass", "jumper", "disable the", "live wire", "without unplugging", "while plugged in",
+    "gas line", "refrigerant", "capacitor", "guaranteed", "100%", "fits all", "universal fit"
+})
+_PREFILTER_MAX_LENGTH = 400
+
+# Redis hash of submitted audit batch IDs -> JSON list of their item summaries, removed once collected
+_AUDIT_BATCHES_KEY = "guardrail:audit_batches"
+
+# Prompt templates are filled with str.format_map; literal braces are doubled
+_EVALUATION_PROMPT_TEMPLATE = """You are an expert evaluator for a appliance parts customer service system. Your job is to detect potential hallucinations or inaccuracies in assistant responses.
+
+DOMAIN CONTEXT:
+- This is a parts agent that helps customers find refrigerator and dishwasher parts
+- The agent has access to a parts database and various tools
+- Responses should be accurate, helpful, and safety-conscious
+
+EVALUATION CRITERIA:
+{criteria}
+
+USER QUERY:
+{user_query}
+
+ASSISTANT RESPONSE:
+{assistant_response}
+
+CONTEXT:
+{context_info}
+
+TASK:
+Evaluate the assistant's response for potential hallucinations or inaccuracies. Consider:
+
+1. FACTUAL ACCURACY: Are part numbers, model numbers, prices, and technical details plausible?
+2. SAFETY COMPLIANCE: Are safety instructions appropriate and complete?
+3. SCOPE ADHERENCE: Does the response stay within the scope of refrigerator/dishwasher parts?
+4. LOGICAL CONSISTENCY: Do the recommendations and advice make logical sense?
+5. QUALIFICATION OF CLAIMS: Are uncertain statements properly qualified?
+
+Return your evaluation as a JSON object with this exact structure:
+{{
+    "is_hallucination": boolean,
+    "confidence_score": float (0.0 to 1.0),
+    "reasons": ["reason1", "reason2", ...],
+    "specific_issues": {{
+        "part_accuracy": "assessment",
+        "safety_concerns": "assessment", 
+        "scope_violations": "assessment",
+        "logical_inconsistencies": "assessment"
+    }},
+    "severity": "low|medium|high",
+    "recommendation": "allow|warn|block"
+}}
+
+Be conservative - only flag clear hallucinations or safety issues. Uncertainty or general advice should generally be allowed."""
+
+_TRIAGE_PROMPT_TEMPLATE = """You screen answers from a refrigerator and dishwasher parts assistant for possible hallucinations or unsafe advice.
+
+USER QUERY:
+{user_query}
+
+ASSISTANT RESPONSE:
+{assistant_response}
+
+CONTEXT:
+{context_info}
+
+Reply with one JSON object on a single line: {{"suspicious": boolean, "confidence": float}}
+- suspicious: whether the response may contain a hallucination or unsafe advice
+- confidence: probability (0.0 to 1.0) that the response contains a hallucination or unsafe advice (not your confidence in the verdict)"""
+
+# Token budgets for evaluator replies (the full evaluation JSON is a few hundred tokens)
+_TRIAGE_MAX_TOKENS = 150
+_EVALUATION_MAX_TOKENS = 600
+
+_BATCH_ITEM_TEMPLATE = """ITEM {index}:
+USER QUERY:
+{user_query}
+
+ASSISTANT RESPONSE:
+{assistant_response}
+
+CONTEXT:
+{context_info}"""
+
+_BATCH_EVALUATION_PROMPT_TEMPLATE = """You are an expert evaluator for a appliance parts customer service system. Your job is to detect potential hallucinations or inaccuracies in assistant responses.
+
+DOMAIN CONTEXT:
+- This is a parts agent that helps customers find refrigerator and dishwasher parts
+- The agent has access to a parts database and various tools
+- Responses should be accurate, helpful, and safety-conscious
+
+EVALUATION CRITERIA:
+{criteria}
+
+Evaluate each of the following {item_count} items independently for factual accuracy, safety compliance, scope adherence, logical consistency and qualification of claims.
+
+{item_sections}
+
+Return a JSON object with one evaluation per item, in item order:
+{{
+    "evaluations": [
+        {{
+            "item": int,
+            "is_hallucination": boolean,
+            "confidence_score": float (0.0 to 1.0),
+            "reasons": ["reason1", "reason2", ...],
+            "specific_issues": {{
+                "part_accuracy": "assessment",
+                "safety_concerns": "assessment",
+                "scope_violations": "assessment",
+                "logical_inconsistencies": "assessment"
+            }},
+            "severity": "low|medium|high",
+            "recommendation": "allow|warn|block"
+        }}
+    ]
+}}
+
+Be conservative - only flag clear hallucinations or safety issues. Uncertainty or general advice should generally be allowed."""
+
 class GuardrailAction(Enum):
     """Actions to take when hallucination is detected"""
     ALLOW = "allow"
@@ -36,7 +165,15 @@ class HallucinationGuardrail:
                  base_url: str = "https://api.deepseek.com",
                  model: str = "deepseek-chat",
                  threshold: float = 0.7,
-                 action: GuardrailAction = GuardrailAction.WARN):
+                 action: GuardrailAction = GuardrailAction.WARN,
+                 cache_ttl: float = 3600.0,
+                 batch_size: int = 8,
+                 flush_interval_ms: float = 0.0,
+                 enable_prefilter: bool = True,
+                 fast_model: Optional[str] = None,
+                 audit_api_key: Optional[str] = None,
+                 audit_model: str = "gpt-4o-mini",
+                 audit_redis_url: Optional[str] = None):
         """
         Initialize the guardrail
         
@@ -46,18 +183,45 @@ class HallucinationGuardrail:
             model: Model to use for evaluation
             threshold: Confidence threshold above which to trigger action (0-1)
             action: Default action to take when hallucination detected
+            cache_ttl: Seconds to reuse an evaluation of an identical query/response/context (0 disables)
+            batch_size: Maximum number of evaluations coalesced into one LLM call
+            flush_interval_ms: How long to wait for more evaluations before flushing a batch
+                               (0 disables batching, which suits latency-sensitive chat turns)
+            enable_prefilter: Allow short, tool-backed responses locally without an LLM call
+            fast_model: Cheaper model that triages responses first; the full evaluation only runs
+                        when it flags a response as suspicious (None disables triage)
+            audit_api_key: OpenAI API key for offline audits through the Batch API (None disables
+                           non-urgent evaluations, which are then evaluated inline)
+            audit_model: Model used for Batch API audits
+            audit_redis_url: Redis URL where submitted audit batch IDs are kept until collected, so a
+                             restart resumes polling them (None keeps them in memory only)
         """
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         if not self.api_key:
             raise ValueError("DeepSeek API key is required. Set DEEPSEEK_API_KEY environment variable or pass api_key parameter.")
         
-        self.client = OpenAI(
+        self.client = get_async_client(
             api_key=self.api_key,
             base_url=base_url
         )
         self.model = model
+        self.fast_model = fast_model
+        # Non-urgent evaluations are queued and scored later through the (cheaper) OpenAI Batch API
+        self.audit_client = get_async_client(api_key=audit_api_key) if audit_api_key else None
+        self.audit_model = audit_model
+        self._audit_queue: List[Tuple[str, str, Optional[Dict[str, Any]]]] = []
+        self._audit_batches: Dict[str, List[str]] = {}  # Submitted batch ID -> item summaries, until collected
+        self._audit_redis = None
+        if self.audit_client and audit_redis_url:
+            import redis.asyncio as redis_asyncio
+            self._audit_redis = redis_asyncio.from_url(audit_redis_url)
         self.threshold = threshold
         self.default_action = action
+        self.enable_prefilter = enable_prefilter
+        self.cache = ResponseCache(ttl=cache_ttl) if cache_ttl > 0 else None
+        self._batcher = None
+        if flush_interval_ms > 0:
+            self._batcher = MicroBatcher(self._evaluate_batch, batch_size, flush_interval_ms / 1000.0)
         
         # Parts-specific evaluation criteria
         self.evaluation_criteria = {
@@ -69,6 +233,28 @@ class HallucinationGuardrail:
             "troubleshooting_advice": "Ensure troubleshooting advice is sound and appropriate",
             "model_specificity": "Check if model-specific claims are appropriately qualified"
         }
+        # Serialized once; the criteria are static and appear in every evaluation prompt
+        self._criteria_json = json.dumps(self.evaluation_criteria, indent=2)
+    
+    def _format_context_info(self, context: Dict[str, Any] = None) -> str:
+        """Summarize evaluation context (tools, parts, history) for the prompt"""
+        if not context:
+            return ""
+        
+        lines = [""]  # Leading empty entry keeps the original leading newline
+        if "tools_used" in context:
+            lines.append(f"Tools used: {', '.join(context['tools_used'])}")
+        if "parts_found" in context:
+            part_list = context['parts_found']
+            parts_line = f"Parts found in database: {len(part_list)}"
+            if part_list:
+                parts_line += f" (examples: {', '.join(part_list[:3])})"
+            lines.append(parts_line)
+        if "conversation_history" in context:
+            lines.append(f"Previous conversation turns: {len(context['conversation_history'])}")
+        if context.get("is_tool_result"):
+            lines.append(f"Evaluating tool result from: {context.get('tool_name', 'unknown')}")
+        return "\n".join(lines) if len(lines) > 1 else ""
     
     def get_evaluation_prompt(self, 
                             user_query: str, 
@@ -76,69 +262,37 @@ class HallucinationGuardrail:
                             context: Dict[str, Any] = None) -> str:
         """Build the evaluation prompt for deepseek-chat"""
         
-        context_info = ""
-        if context:
-            if "tools_used" in context:
-                context_info += f"\nTools used: {', '.join(context['tools_used'])}"
-            if "parts_found" in context:
-                part_list = context['parts_found']
-                context_info += f"\nParts found in database: {len(part_list)}"
-                if part_list:
-                    context_info += f" (examples: {', '.join(part_list[:3])})"
-            if "conversation_history" in context:
-                context_info += f"\nPrevious conversation turns: {len(context['conversation_history'])}"
-            if context.get("is_tool_result"):
-                context_info += f"\nEvaluating tool result from: {context.get('tool_name', 'unknown')}"
-        
-        return f"""You are an expert evaluator for a appliance parts customer service system. Your job is to detect potential hallucinations or inaccuracies in assistant responses.
-
-DOMAIN CONTEXT:
-- This is a parts agent that helps customers find refrigerator and dishwasher parts
-- The agent has access to a parts database and various tools
-- Responses should be accurate, helpful, and safety-conscious
-
-EVALUATION CRITERIA:
-{json.dumps(self.evaluation_criteria, indent=2)}
-
-USER QUERY:
-{user_query}
-
-ASSISTANT RESPONSE:
-{assistant_response}
-
-CONTEXT:
-{context_info}
-
-TASK:
-Evaluate the assistant's response for potential hallucinations or inaccuracies. Consider:
-
-1. FACTUAL ACCURACY: Are part numbers, model numbers, prices, and technical details plausible?
-2. SAFETY COMPLIANCE: Are safety instructions appropriate and complete?
-3. SCOPE ADHERENCE: Does the response stay within the scope of refrigerator/dishwasher parts?
-4. LOGICAL CONSISTENCY: Do the recommendations and advice make logical sense?
-5. QUALIFICATION OF CLAIMS: Are uncertain statements properly qualified?
-
-Return your evaluation as a JSON object with this exact structure:
-{{
-    "is_hallucination": boolean,
-    "confidence_score": float (0.0 to 1.0),
-    "reasons": ["reason1", "reason2", ...],
-    "specific_issues": {{
-        "part_accuracy": "assessment",
-        "safety_concerns": "assessment", 
-        "scope_violations": "assessment",
-        "logical_inconsistencies": "assessment"
-    }},
-    "severity": "low|medium|high",
-    "recommendation": "allow|warn|block"
-}}
+        return _EVALUATION_PROMPT_TEMPLATE.format_map({
+            "criteria": self._criteria_json,
+            "user_query": user_query,
+            "assistant_response": assistant_response,
+            "context_info": self._format_context_info(context)
+        })
 
-Be conservative - only flag clear hallucinations or safety issues. Uncertainty or general advice should generally be allowed."""
+    def get_batch_evaluation_prompt(self, items: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> str:
+        """Build one evaluation prompt covering several (query, response, context) items"""
+        
+        item_sections = [
+            _BATCH_ITEM_TEMPLATE.format_map({
+                "index": index,
+                "user_query": user_query,
+                "assistant_response": assistant_response,
+                "context_info": self._format_context_info(context)
+            })
+            for index, (user_query, assistant_response, context) in enumerate(items)
+        ]
+        
+        return _BATCH_EVALUATION_PROMPT_TEMPLATE.format_map({
+            "criteria": self._criteria_json,
+            "item_count": len(items),
+            "item_sections": "\n".join(item_sections)
+        })
 
     async def evaluate_response(self, 
                               user_query: str, 
                               assistant_response: str, 
-                              context: Dict[str, Any] = None) -> GuardrailResult:
+                              context: Dict[str, Any] = None,
+                              urgent: bool = True) -> GuardrailResult:
         """
         Evaluate a response for potential hallucinations
         
@@ -146,74 +300,380 @@ Be conservative - only flag clear hallucinations or safety issues. Uncertainty o
             user_query: Original user query
             assistant_response: Response from the parts agent
             context: Additional context (tools used, parts found, etc.)
+            urgent: When False and an audit client is configured, queue the response for the
+                    next Batch API audit and return a LOG result immediately
             
         Returns:
             GuardrailResult with evaluation details
         """
-        try:
-            prompt = self.get_evaluation_prompt(user_query, assistant_response, context)
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a precise evaluator. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,  # Low temperature for consistent evaluation
-                max_tokens=1000
-            )
-            
-            evaluation_text = response.choices[0].message.content.strip()
-            
-            # Parse JSON response (handle markdown wrapping)
-            try:
-                # Remove markdown code block formatting if present
-                if evaluation_text.startswith("```json"):
-                    evaluation_text = evaluation_text.replace("```json", "").replace("```", "").strip()
-                elif evaluation_text.startswith("```"):
-                    evaluation_text = evaluation_text.replace("```", "").strip()
-                
-                evaluation = json.loads(evaluation_text)
-            except json.JSONDecodeError:
-                # Fallback if JSON parsing fails
-                logger.error(f"Failed to parse evaluation JSON: {evaluation_text}")
-                return GuardrailResult(
-                    is_hallucination=False,
-                    confidence_score=0.0,
-                    reasons=["Evaluation service error"],
-                    action=GuardrailAction.LOG,
-                    details={"error": "JSON parsing failed", "raw_response": evaluation_text}
-                )
-            
-            # Determine action based on confidence and severity
-            confidence = evaluation.get("confidence_score", 0.0)
-            severity = evaluation.get("severity", "low")
-            recommendation = evaluation.get("recommendation", "allow")
-            
-            action = self._determine_action(confidence, severity, recommendation)
-            
-            return GuardrailResult(
-                is_hallucination=evaluation.get("is_hallucination", False),
-                confidence_score=confidence,
-                reasons=evaluation.get("reasons", []),
-                action=action,
-                details={
-                    "specific_issues": evaluation.get("specific_issues", {}),
-                    "severity": severity,
-                    "recommendation": recommendation,
-                    "evaluation_model": self.model
-                }
-            )
-            
-        except Exception as e:
-            logger.error(f"Error evaluating response: {str(e)}")
+        if self.enable_prefilter:
+            prefilter_result = self._local_prefilter(user_query, assistant_response, context)
+            if prefilter_result is not None:
+                return prefilter_result
+        
+        if not urgent and self.audit_client:
+            self._audit_queue.append((user_query, assistant_response, context))
             return GuardrailResult(
                 is_hallucination=False,
                 confidence_score=0.0,
-                reasons=[f"Evaluation error: {str(e)}"],
+                reasons=["Queued for offline audit"],
                 action=GuardrailAction.LOG,
-                details={"error": str(e)}
+                details={"audit_queued": True}
+            )
+        
+        cache_key = None
+        if self.cache:
+            cache_key = make_cache_key(self.model, user_query, assistant_response, context or {})
+            cached_result = self.cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
+        
+        if self.fast_model:
+            # Triage verdicts are cached under the fast model so they never pass for a full evaluation
+            triage_key = make_cache_key(self.fast_model, user_query, assistant_response, context or {}) if self.cache else None
+            triage_result = self.cache.get(triage_key) if triage_key else None
+            if triage_result is None:
+                try:
+                    triage_result = await self._fast_triage(user_query, assistant_response, context)
+                except Exception as e:
+                    # A broken triage escalates to the full evaluation instead of disabling the guardrail
+                    logger.warning(f"Fast triage failed, running full evaluation: {str(e)}")
+                if triage_result is not None and triage_key:
+                    self.cache.set(triage_key, triage_result)
+            if triage_result is not None:
+                return triage_result
+        
+        try:
+            if self._batcher:
+                result = await self._batcher.submit((user_query, assistant_response, context))
+            else:
+                result = await self._evaluate_single(user_query, assistant_response, context)
+        except Exception as e:
+            logger.error(f"Error evaluating response: {str(e)}")
+            return self._error_result(str(e))
+        
+        # Only successful evaluations are cached; error fallbacks are retried next time
+        if cache_key and "error" not in result.details:
+            self.cache.set(cache_key, result)
+        
+        return result
+    
+    def _local_prefilter(self, 
+                         user_query: str, 
+                         assistant_response: str, 
+                         context: Dict[str, Any] = None) -> Optional[GuardrailResult]:
+        """
+        Allow obviously safe responses without calling the evaluation model.
+        
+        A response passes when it is short, tools were used for the turn, every part ID it
+        mentions was returned by a tool, and it contains no safety-sensitive phrase.
+        Returns None when the response needs the full evaluation.
+        """
+        if not context or not context.get("tools_used"):
+            return None
+        if len(assistant_response) >= _PREFILTER_MAX_LENGTH:
+            return None
+        
+        backed_parts = set(context.get("parts_found", []))
+        if any(match.group() not in backed_parts for match in _PART_ID_RE.finditer(assistant_response)):
+            return None
+        
+        response_lower = assistant_response.lower()
+        if any(phrase in response_lower for phrase in _UNSAFE_PHRASES):
+            return None
+        
+        return GuardrailResult(
+            is_hallucination=False,
+            confidence_score=0.0,
+            reasons=["Passed local pre-filter"],
+            action=GuardrailAction.ALLOW,
+            details={"prefilter": True, "evaluation_model": "local"}
+        )
+    
+    async def _fast_triage(self, 
+                           user_query: str, 
+                           assistant_response: str, 
+                           context: Dict[str, Any] = None) -> Optional[GuardrailResult]:
+        """
+        Screen a response with the fast model. Returns ALLOW when it is clearly fine,
+        or None when the full evaluation should run (suspicious, uncertain or unparseable).
+        """
+        prompt = _TRIAGE_PROMPT_TEMPLATE.format_map({
+            "user_query": user_query,
+            "assistant_response": assistant_response,
+            "context_info": self._format_context_info(context)
+        })
+        
+        response = await self.client.chat.completions.create(
+            model=self.fast_model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.0,
+            max_tokens=_TRIAGE_MAX_TOKENS,
+            response_format={"type": "json_object"}
+        )
+        
+        try:
+            triage = GuardrailTriage.model_validate_json(response.choices[0].message.content)
+        except ValidationError:
+            return None
+        
+        if triage.suspicious or triage.confidence > 0.5:
+            return None
+        
+        return GuardrailResult(
+            is_hallucination=False,
+            confidence_score=triage.confidence,
+            reasons=["Passed fast triage"],
+            action=GuardrailAction.ALLOW,
+            details={"triage": True, "evaluation_model": self.fast_model}
+        )
+    
+    async def _evaluate_single(self, 
+                             user_query: str, 
+                             assistant_response: str, 
+                             context: Dict[str, Any] = None) -> GuardrailResult:
+        """Evaluate one response with a dedicated LLM call"""
+        prompt = self.get_evaluation_prompt(user_query, assistant_response, context)
+        
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You are a precise evaluator. Always respond with valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,  # Low temperature for consistent evaluation
+            max_tokens=_EVALUATION_MAX_TOKENS,
+            response_format={"type": "json_object"}  # JSON mode: no markdown fences to strip
+        )
+        
+        evaluation_text = response.choices[0].message.content
+        
+        # Parse and validate in one pass; malformed or out-of-range fields fall back to LOG
+        try:
+            evaluation = GuardrailEvaluation.model_validate_json(evaluation_text)
+        except ValidationError:
+            logger.error(f"Failed to parse evaluation JSON: {evaluation_text}")
+            return self._parse_error_result(evaluation_text)
+        
+        return self._build_result(evaluation)
+    
+    async def _evaluate_batch(self, 
+                            items: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> List[GuardrailResult]:
+        """Evaluate several responses with a single LLM call (used by the micro-batcher)"""
+        if len(items) == 1:
+            return [await self._evaluate_single(*items[0])]
+        
+        prompt = self.get_batch_evaluation_prompt(items)
+        
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You are a precise evaluator. Always respond with valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=min(_EVALUATION_MAX_TOKENS * len(items), 8000),
+            response_format={"type": "json_object"}
+        )
+        
+        evaluation_text = response.choices[0].message.content
+        
+        try:
+            evaluations = GuardrailBatchEvaluation.model_validate_json(evaluation_text).evaluations
+        except ValidationError:
+            logger.error(f"Failed to parse batch evaluation JSON: {evaluation_text}")
+            return [self._parse_error_result(evaluation_text) for _ in items]
+        
+        # Match evaluations back to items by index; anything missing is logged, not guessed
+        by_item = {}
+        for position, evaluation in enumerate(evaluations):
+            by_item[position if evaluation.item is None else evaluation.item] = evaluation
+        
+        return [
+            self._build_result(by_item[index]) if index in by_item else self._parse_error_result(evaluation_text)
+            for index in range(len(items))
+        ]
+    
+    async def submit_audit_batch(self, 
+                                 items: Optional[List[Tuple[str, str, Optional[Dict[str, Any]]]]] = None) -> Optional[str]:
+        """
+        Submit evaluations to the OpenAI Batch API and return the batch ID (None if nothing to submit).
+        
+        Uses `items` if given, otherwise drains the queue of non-urgent evaluations (requeued if
+        the submission fails). The batch ID is recorded with a summary of each item for run_audits.
+        """
+        if not self.audit_client:
+            raise ValueError("Batch audits require an audit_api_key")
+        
+        drained = items is None
+        if drained:
+            items, self._audit_queue = self._audit_queue, []
+        if not items:
+            return None
+        
+        lines = []
+        for index, (user_query, assistant_response, context) in enumerate(items):
+            lines.append(orjson.dumps({
+                "custom_id": f"item-{index}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.audit_model,
+                    "messages": [
+                        {"role": "system", "content": "You are a precise evaluator. Always respond with valid JSON."},
+                        {"role": "user", "content": self.get_evaluation_prompt(user_query, assistant_response, context)}
+                    ],
+                    "temperature": 0.1,
+                    "max_tokens": _EVALUATION_MAX_TOKENS,
+                    "response_format": {"type": "json_object"}
+                }
+            }))
+        
+        try:
+            batch_file = await self.audit_client.files.create(
+                file=("guardrail_audit.jsonl", b"\n".join(lines)),
+                purpose="batch"
+            )
+            batch = await self.audit_client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h",
+                metadata={"item_count": str(len(items))}
             )
+        except Exception:
+            if drained:
+                self._audit_queue[:0] = items  # Put them back for the next attempt, ahead of newer items
+            raise
+        logger.info(f"Submitted guardrail audit batch {batch.id} with {len(items)} items")
+        
+        summaries = [self._audit_item_summary(user_query, context) for user_query, _, context in items]
+        self._audit_batches[batch.id] = summaries
+        if self._audit_redis is not None:
+            await self._audit_redis.hset(_AUDIT_BATCHES_KEY, batch.id, orjson.dumps(summaries))
+        return batch.id
+    
+    @staticmethod
+    def _audit_item_summary(user_query: str, context: Optional[Dict[str, Any]]) -> str:
+        """Short label that identifies an audited item in the logs (the tool call, for tool results)"""
+        if context and context.get("tool_name"):
+            return f"{context['tool_name']} {orjson.dumps(context.get('tool_args', {}), default=str).decode()}"
+        return user_query[:200]
+    
+    async def collect_audit_batch(self, batch_id: str, item_count: int) -> Optional[List[GuardrailResult]]:
+        """
+        Fetch the results of an audit batch of `item_count` items, in submission order.
+        
+        Returns None while the batch is still running. Items that failed or could not be
+        parsed come back as LOG results carrying the error.
+        """
+        if not self.audit_client:
+            raise ValueError("Batch audits require an audit_api_key")
+        
+        batch = await self.audit_client.batches.retrieve(batch_id)
+        if batch.status in ("validating", "in_progress", "finalizing"):
+            return None
+        if batch.status != "completed" or not batch.output_file_id:
+            logger.error(f"Guardrail audit batch {batch_id} ended with status {batch.status}")
+            return [self._error_result(f"Audit batch {batch.status}") for _ in range(item_count)]
+        
+        output = await self.audit_client.files.content(batch.output_file_id)
+        by_index = {}
+        for line in output.text.splitlines():
+            if not line:
+                continue
+            record = orjson.loads(line)
+            index = int(record["custom_id"].rsplit("-", 1)[1])
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                by_index[index] = self._error_result(str(record.get("error") or response.get("status_code")))
+                continue
+            evaluation_text = response["body"]["choices"][0]["message"]["content"]
+            try:
+                result = self._build_result(GuardrailEvaluation.model_validate_json(evaluation_text))
+                result.details["evaluation_model"] = self.audit_model
+            except ValidationError:
+                result = self._parse_error_result(evaluation_text)
+            by_index[index] = result
+        
+        return [
+            by_index.get(index) or self._error_result("Missing from audit batch output")
+            for index in range(item_count)
+        ]
+    
+    async def run_audits(self, interval: float) -> None:
+        """
+        Every `interval` seconds, submit the queued non-urgent evaluations and collect finished batches.
+        
+        Runs until cancelled. Flagged items are logged with their summaries (tool name and args);
+        batch IDs and summaries stay recorded (in Redis when configured) until collected.
+        """
+        if self._audit_redis is not None:
+            try:
+                stored = await self._audit_redis.hgetall(_AUDIT_BATCHES_KEY)
+                self._audit_batches.update({batch_id.decode(): orjson.loads(summaries) for batch_id, summaries in stored.items()})
+            except Exception as e:
+                logger.warning(f"Failed to load pending guardrail audit batches: {str(e)}")
+        
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.submit_audit_batch()
+                for batch_id, summaries in list(self._audit_batches.items()):
+                    results = await self.collect_audit_batch(batch_id, len(summaries))
+                    if results is None:
+                        continue
+                    flagged = 0
+                    for summary, result in zip(summaries, results):
+                        if result.is_hallucination:
+                            flagged += 1
+                            logger.warning(f"Guardrail audit flagged {summary}: {'; '.join(result.reasons)}")
+                    logger.info(f"Guardrail audit batch {batch_id}: {flagged}/{len(summaries)} items flagged")
+                    del self._audit_batches[batch_id]
+                    if self._audit_redis is not None:
+                        await self._audit_redis.hdel(_AUDIT_BATCHES_KEY, batch_id)
+            except Exception as e:
+                logger.warning(f"Guardrail audit cycle failed: {str(e)}")
+    
+    async def close(self) -> None:
+        """Release the audit batch store's connection"""
+        if self._audit_redis is not None:
+            await self._audit_redis.aclose()
+    
+    def _build_result(self, evaluation: GuardrailEvaluation) -> GuardrailResult:
+        """Turn a validated evaluation into a GuardrailResult"""
+        # Determine action based on confidence and severity
+        action = self._determine_action(evaluation.confidence_score, evaluation.severity, evaluation.recommendation)
+        
+        return GuardrailResult(
+            is_hallucination=evaluation.is_hallucination,
+            confidence_score=evaluation.confidence_score,
+            reasons=evaluation.reasons,
+            action=action,
+            details={
+                "specific_issues": evaluation.specific_issues,
+                "severity": evaluation.severity,
+                "recommendation": evaluation.recommendation,
+                "evaluation_model": self.model
+            }
+        )
+    
+    def _parse_error_result(self, raw_response: str) -> GuardrailResult:
+        return GuardrailResult(
+            is_hallucination=False,
+            confidence_score=0.0,
+            reasons=["Evaluation service error"],
+            action=GuardrailAction.LOG,
+            details={"error": "JSON parsing failed", "raw_response": raw_response}
+        )
+    
+    def _error_result(self, error: str) -> GuardrailResult:
+        return GuardrailResult(
+            is_hallucination=False,
+            confidence_score=0.0,
+            reasons=[f"Evaluation error: {error}"],
+            action=GuardrailAction.LOG,
+            details={"error": error}
+        )
     
     def _determine_action(self, confidence: float, severity: str, recommendation: str) -> GuardrailAction:
         """Determine what action to take based on evaluation results"""
@@ -0,0 +1,125 @@
+"""
+Shared LLM client for PartSelect agents
+One pooled httpx.AsyncClient sits under every AsyncOpenAI client so all agents reuse warm connections
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+from .batching import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+# Connection pool settings (limits are set on the transport so they are enforced under asyncio.gather bursts)
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Client-side request rate limit (requests per second and burst size); a rate of 0 disables it
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "50"))
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "50"))
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Token-bucket rate limiter in front of another async transport"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, rate: float, capacity: int):
+        self._transport = transport
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def _acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self._acquire()
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+class LLMBatcher:
+    """
+    Coalesces chat completion requests that arrive within `flush_interval` seconds and sends
+    each window as concurrent requests over the shared connection pool.
+
+    The providers used here have no synchronous batch endpoint, so a window is not one HTTP
+    call; it turns bursts of turns into evenly paced groups of HTTP/2 streams. Opt-in, since
+    every request waits up to one window.
+    """
+
+    def __init__(self, client: AsyncOpenAI, max_batch_size: int = 8, flush_interval: float = 0.02):
+        self.client = client
+        self._batcher = MicroBatcher(self._send, max_batch_size, flush_interval)
+
+    async def create(self, **kwargs) -> Any:
+        """Queue one chat.completions.create call and return its completion (errors are re-raised)"""
+        result = await self._batcher.submit(kwargs)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def _send(self, requests: List[Dict[str, Any]]) -> List[Any]:
+        return await asyncio.gather(
+            *(self.client.chat.completions.create(**request) for request in requests),
+            return_exceptions=True
+        )
+
+_http_client: Optional[httpx.AsyncClient] = None
+_clients: Dict[Tuple[str, Optional[str]], AsyncOpenAI] = {}
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        transport = httpx.AsyncHTTPTransport(limits=HTTP_LIMITS, http2=True)
+        if LLM_RATE_LIMIT > 0:
+            transport = RateLimitedTransport(transport, rate=LLM_RATE_LIMIT, capacity=LLM_RATE_BURST)
+        _http_client = httpx.AsyncClient(transport=transport, timeout=HTTP_TIMEOUT)
+    return _http_client
+
+def get_async_client(api_key: str, base_url: Optional[str] = None) -> AsyncOpenAI:
+    """Return a shared AsyncOpenAI client for the given credentials and endpoint"""
+    key = (api_key, base_url)
+    client = _clients.get(key)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=get_http_client()
+        )
+        _clients[key] = client
+        logger.info(f"Created shared async LLM client for {base_url or 'default endpoint'}")
+    return client
+
+async def close_clients() -> None:
+    """Close the pooled HTTP client and forget the shared LLM clients (call on application shutdown)"""
+    global _http_client
+    _clients.clear()
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+        logger.info("Closed pooled LLM HTTP client")
+    _http_client = None
+
+async def prewarm_client(client: AsyncOpenAI, timeout: float = 5.0) -> None:
+    """Open a pooled connection (TCP + TLS) to the client's endpoint so the first user request doesn't pay for it"""
+    try:
+        await asyncio.wait_for(client.models.list(), timeout=timeout)
+        logger.info(f"Pre-warmed LLM connection to {client.base_url}")
+    except Exception as e:
+        logger.warning(f"Failed to pre-warm LLM connection to {client.base_url}: {str(e)}")
@@ -4,26 +4,103 @@ Implements routing, handoffs, and parallel execution based on important_info.md
 """
 
 import asyncio
-import json
 import logging
-from typing import Dict, Any, List, Optional, Union
-from datetime import datetime
-from openai import OpenAI
+import orjson
+from typing import Dict, Any, List, Optional, Tuple
+from openai import AsyncOpenAI
+from pydantic import ValidationError
 import re
+from functools import lru_cache
+from itertools import chain
 
-from .structured_outputs import *
-from .partselect_web_tools import *
-from .tools import search_parts, check_compatibility, get_installation_guide, get_troubleshooting_guide, get_part_details
+from .batching import MicroBatcher
+from .response_cache import ResponseCache
+from .structured_outputs import (
+    AgentResponse, AgentRouting, ApplianceType, ConfidenceLevel, FinalResponse, ModelValidation, PartInfo,
+    PartSearchCriteria, PartSearchResult, PopularModel, QueryClassification, QueryClassificationBatch,
+    QueryType, UrgencyLevel
+)
+from .partselect_web_tools import get_popular_models, search_partselect_web, validate_model_number
+from .tools import search_parts
 
 logger = logging.getLogger(__name__)
 
+# Model-number shapes: letters then digits, digits then letters, or any 6-15 character alphanumeric token
+_MODEL_RE = re.compile(r'\b(?:[A-Z]{2,}[0-9]{3,}[A-Z0-9]*|[0-9]{3,}[A-Z]{2,}[A-Z0-9]*|[A-Z0-9]{6,15})\b')
+
+@lru_cache(maxsize=1024)
+def _extract_model_numbers(query: str) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(_MODEL_RE.findall(query.upper())))
+
+OUT_OF_SCOPE_MESSAGE = "I'm sorry, but I can only help with refrigerator and dishwasher parts. For other appliances like ovens, microwaves, or washing machines, please visit our main website or contact our general support team."
+
+# Appliance keywords (matched as substrings, so plurals count); refrigerator wins when both appear
+_REFRIGERATOR_RE = re.compile(r'refrigerator|fridge', re.IGNORECASE)
+_DISHWASHER_RE = re.compile(r'dishwasher', re.IGNORECASE)
+
+def _guess_appliance_type(query: str) -> ApplianceType:
+    """Keyword guess of the appliance type, as the agents use when no classification is given"""
+    if _REFRIGERATOR_RE.search(query):
+        return ApplianceType.REFRIGERATOR
+    if _DISHWASHER_RE.search(query):
+        return ApplianceType.DISHWASHER
+    return ApplianceType.BOTH
+
+def _fallback_classification(query: str) -> QueryClassification:
+    """Fallback classification from a keyword scan of the query"""
+    return QueryClassification(
+        query_type=QueryType.GENERAL_INFO,
+        appliance_type=_guess_appliance_type(query),
+        urgency=UrgencyLevel.LOW,
+        confidence=ConfidenceLevel.LOW,
+        requires_model_number=False,
+        extracted_entities={},
+        reasoning="Error in classification, using fallback"
+    )
+
+# Query type -> (primary agent, secondary agents, run secondaries in parallel)
+_ROUTING_MAP = {
+    QueryType.PART_SEARCH: ("ProductSearchAgent", ("WebSearchAgent",), False),
+    QueryType.MODEL_LOOKUP: ("ModelLookupAgent", ("ProductSearchAgent",), False),
+    QueryType.COMPATIBILITY_CHECK: ("ProductSearchAgent", ("WebSearchAgent",), False),
+    QueryType.INSTALLATION_GUIDE: ("WebSearchAgent", ("ProductSearchAgent",), False),
+    QueryType.TROUBLESHOOTING: ("WebSearchAgent", ("ProductSearchAgent",), False),
+    QueryType.BRAND_INQUIRY: ("WebSearchAgent", ("ProductSearchAgent",), True),
+    QueryType.GENERAL_INFO: ("WebSearchAgent", (), False),
+    QueryType.OUT_OF_SCOPE: ("OutOfScopeAgent", (), False),
+}
+
+# Part categories suggested alongside search results, per appliance type
+_RELATED_CATEGORIES = {
+    ApplianceType.REFRIGERATOR: ("Filters", "Handles", "Shelves", "Ice Makers", "Motors"),
+    ApplianceType.DISHWASHER: ("Racks", "Filters", "Spray Arms", "Pumps", "Latches"),
+}
+_DEFAULT_RELATED_CATEGORIES = ("Filters", "Handles", "Motors", "Pumps", "Racks")
+
+# Caps concurrent LLM calls from the specialized agents so bursts don't trip provider rate limits
+LLM_SEM = asyncio.Semaphore(8)
+
 class BaseSpecializedAgent:
     """Base class for specialized agents"""
     
-    def __init__(self, name: str, client: OpenAI, model: str = "deepseek-chat"):
+    # One AsyncOpenAI client shared by every specialized agent, set once by the orchestrator
+    _CLIENT: Optional[AsyncOpenAI] = None
+    
+    def __init__(self, name: str, model: str = "deepseek-chat"):
         self.name = name
-        self.client = client
         self.model = model
+        self.llm_semaphore = LLM_SEM  # Every completion call goes through this
+    
+    @classmethod
+    def set_client(cls, client: AsyncOpenAI) -> None:
+        """Install the shared client used by all specialized agents"""
+        BaseSpecializedAgent._CLIENT = client
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        if BaseSpecializedAgent._CLIENT is None:
+            raise RuntimeError("No LLM client configured; create a MultiAgentOrchestrator first")
+        return BaseSpecializedAgent._CLIENT
         
     async def process(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
         """Process a query and return structured response"""
@@ -32,8 +109,10 @@ class BaseSpecializedAgent:
 class TriagingAgent(BaseSpecializedAgent):
     """Routes queries to appropriate agents based on classification"""
     
-    def __init__(self, client: OpenAI, model: str = "deepseek-chat"):
-        super().__init__("TriagingAgent", client, model)
+    def __init__(self, model: str = "deepseek-chat", cache_ttl: float = 3600.0):
+        super().__init__("TriagingAgent", model)
+        # Classifications keyed by normalized query text; repeated queries skip the LLM call
+        self.classification_cache = ResponseCache(maxsize=4096, ttl=cache_ttl) if cache_ttl > 0 else None
         
     def get_system_prompt(self) -> str:
         return """You are a Triaging Agent for PartSelect, a parts e-commerce website. Your role is to analyze user queries and classify them for routing to specialized agents.
@@ -73,123 +152,129 @@ RESPOND WITH VALID JSON IN THIS EXACT FORMAT:
 
     async def classify_query(self, query: str, context: Dict[str, Any] = None) -> QueryClassification:
         """Classify user query for routing"""
+        cached = self._cached_classification(query)
+        if cached is not None:
+            return cached
+        
         try:
+            # JSON mode requires the word "JSON" in the prompt, hence the closing instruction
             messages = [
                 {"role": "system", "content": self.get_system_prompt()},
-                {"role": "user", "content": f"Classify this query: '{query}'"}
+                {"role": "user", "content": f"Classify this query: '{query}'"},
+                {"role": "system", "content": "Respond with valid JSON matching the QueryClassification schema."}
             ]
+            async with self.llm_semaphore:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.1,
+                    response_format={"type": "json_object"}
+                )
             
-            # Use regular completion with JSON mode (DeepSeek doesn't support structured outputs)
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages + [{"role": "system", "content": "Respond with valid JSON matching the QueryClassification schema."}],
-                temperature=0.1
-            )
+            # Parsed and validated in one pass by pydantic-core, without an intermediate dict
+            classification = QueryClassification.model_validate_json(response.choices[0].message.content)
+            self._store_classification(query, classification)
+            return classification
             
-            # Parse the JSON response manually
-            try:
-                import json
-                response_content = response.choices[0].message.content
-                # Remove markdown code blocks if present
-                if "```json" in response_content:
-                    response_content = response_content.split("```json")[1].split("```")[0].strip()
-                elif "```" in response_content:
-                    response_content = response_content.split("```")[1].split("```")[0].strip()
-                
-                classification_data = json.loads(response_content)
-                return QueryClassification(**classification_data)
-            except Exception as parse_error:
-                logger.warning(f"Failed to parse classification JSON: {parse_error}")
-                # Create a basic fallback classification
-                appliance_type = ApplianceType.BOTH
-                query_lower = query.lower()
-                if "refrigerator" in query_lower or "fridge" in query_lower:
-                    appliance_type = ApplianceType.REFRIGERATOR
-                elif "dishwasher" in query_lower:
-                    appliance_type = ApplianceType.DISHWASHER
-                
-                return QueryClassification(
-                    query_type=QueryType.GENERAL_INFO,
-                    appliance_type=appliance_type,
-                    urgency=UrgencyLevel.LOW,
-                    confidence=ConfidenceLevel.MEDIUM,
-                    requires_model_number=False,
-                    extracted_entities={},
-                    reasoning="Fallback classification due to parsing error"
+        except Exception as e:
+            logger.error(f"Error classifying query: {str(e)}")
+            return _fallback_classification(query)
+    
+    async def classify_queries(self, queries: List[str]) -> List[QueryClassification]:
+        """Classify several independent queries with a single LLM call (used by BatchingClassifier)"""
+        if len(queries) == 1:
+            return [await self.classify_query(queries[0])]
+        
+        try:
+            numbered_queries = "\n".join(f"{index}. '{query}'" for index, query in enumerate(queries))
+            messages = [
+                {"role": "system", "content": self.get_system_prompt()},
+                {"role": "user", "content": f"Classify each of these queries independently:\n{numbered_queries}"},
+                {"role": "system", "content": (
+                    'Respond with valid JSON of the form {"classifications": [...]}, holding one object '
+                    'matching the QueryClassification schema per query, in the same order.'
+                )}
+            ]
+            
+            async with self.llm_semaphore:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.1,
+                    response_format={"type": "json_object"}
                 )
             
+            response_content = response.choices[0].message.content
+            try:
+                # Parsed and validated in one pass; any malformed entry fails the whole batch
+                classifications_data = QueryClassificationBatch.model_validate_json(response_content).classifications
+            except ValidationError:
+                # Decode the raw entries so only the malformed ones fall back below
+                classifications_data = orjson.loads(response_content).get("classifications", [])
         except Exception as e:
-            logger.error(f"Error classifying query: {str(e)}")
-            # Fallback classification
-            return QueryClassification(
-                query_type=QueryType.GENERAL_INFO,
-                appliance_type=ApplianceType.BOTH,
-                urgency=UrgencyLevel.LOW,
-                confidence=ConfidenceLevel.LOW,
-                requires_model_number=False,
-                extracted_entities={},
-                reasoning="Error in classification, using fallback"
-            )
+            logger.error(f"Error classifying batch of {len(queries)} queries: {str(e)}")
+            classifications_data = []
+        
+        classifications = []
+        for index, query in enumerate(queries):
+            try:
+                classification = QueryClassification.model_validate(classifications_data[index])  # Validated instances pass through
+                self._store_classification(query, classification)
+            except Exception:
+                classification = _fallback_classification(query)
+            classifications.append(classification)
+        return classifications
+    
+    def _cached_classification(self, query: str) -> Optional[QueryClassification]:
+        if not self.classification_cache:
+            return None
+        return self.classification_cache.get(query.strip().lower())
     
-    async def route_query(self, classification: QueryClassification) -> AgentRouting:
+    def _store_classification(self, query: str, classification: QueryClassification) -> None:
+        # Only successful LLM classifications are cached; fallbacks are retried next time
+        if self.classification_cache:
+            self.classification_cache.set(query.strip().lower(), classification)
+    
+    def route_query(self, classification: QueryClassification) -> AgentRouting:
         """Determine which agents should handle the query"""
-        routing_map = {
-            QueryType.PART_SEARCH: {
-                "primary": "ProductSearchAgent",
-                "secondary": ["WebSearchAgent"],
-                "parallel": False
-            },
-            QueryType.MODEL_LOOKUP: {
-                "primary": "ModelLookupAgent", 
-                "secondary": ["ProductSearchAgent"],
-                "parallel": False
-            },
-            QueryType.COMPATIBILITY_CHECK: {
-                "primary": "ProductSearchAgent",
-                "secondary": ["WebSearchAgent"],
-                "parallel": False
-            },
-            QueryType.INSTALLATION_GUIDE: {
-                "primary": "WebSearchAgent",
-                "secondary": ["ProductSearchAgent"],
-                "parallel": False
-            },
-            QueryType.TROUBLESHOOTING: {
-                "primary": "WebSearchAgent",
-                "secondary": ["ProductSearchAgent"],
-                "parallel": False
-            },
-            QueryType.BRAND_INQUIRY: {
-                "primary": "WebSearchAgent",
-                "secondary": ["ProductSearchAgent"],
-                "parallel": True
-            },
-            QueryType.GENERAL_INFO: {
-                "primary": "WebSearchAgent",
-                "secondary": [],
-                "parallel": False
-            },
-            QueryType.OUT_OF_SCOPE: {
-                "primary": "OutOfScopeAgent",
-                "secondary": [],
-                "parallel": False
-            }
-        }
-        
-        route_config = routing_map.get(classification.query_type, routing_map[QueryType.GENERAL_INFO])
+        primary, secondary, parallel = _ROUTING_MAP.get(classification.query_type, _ROUTING_MAP[QueryType.GENERAL_INFO])
         
         return AgentRouting(
-            primary_agent=route_config["primary"],
-            secondary_agents=route_config["secondary"],
-            parallel_execution=route_config["parallel"],
+            primary_agent=primary,
+            secondary_agents=list(secondary),
+            parallel_execution=parallel,
             routing_reason=f"Query classified as {classification.query_type.value} with {classification.confidence.value} confidence"
         )
 
+class BatchingClassifier:
+    """
+    Coalesces classification requests arriving within a short window into one LLM call.
+    
+    Trades a little latency (up to `flush_interval` seconds) for throughput under concurrent
+    traffic, so it is opt-in.
+    """
+    
+    def __init__(self, triaging_agent: TriagingAgent, max_batch_size: int = 8, flush_interval: float = 0.02):
+        self.triaging_agent = triaging_agent
+        self._batcher = MicroBatcher(triaging_agent.classify_queries, max_batch_size, flush_interval)
+    
+    async def submit(self, query: str, context: Dict[str, Any] = None) -> QueryClassification:
+        """Classify a query as part of the next batch"""
+        cached = self.triaging_agent._cached_classification(query)
+        if cached is not None:
+            return cached
+        
+        try:
+            return await self._batcher.submit(query)
+        except Exception as e:
+            logger.error(f"Batched classification failed: {str(e)}")
+            return _fallback_classification(query)
+
 class ProductSearchAgent(BaseSpecializedAgent):
     """Specialized agent for product/parts search"""
     
-    def __init__(self, client: OpenAI, model: str = "deepseek-chat"):
-        super().__init__("ProductSearchAgent", client, model)
+    def __init__(self, model: str = "deepseek-chat"):
+        super().__init__("ProductSearchAgent", model)
     
     async def process(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
         """Search for parts based on query"""
@@ -203,12 +288,16 @@ class ProductSearchAgent(BaseSpecializedAgent):
             search_results = []
             partselect_links = []
             
-            # 1. Search local database
-            db_results = await search_parts(
-                criteria.search_query, 
-                criteria.appliance_type.value if criteria.appliance_type != ApplianceType.BOTH else "both"
-            )
+            # Search the local database, then PartSelect web (both in-memory lookups; the web tool reports its own errors)
+            appliance_type = criteria.appliance_type.value if criteria.appliance_type != ApplianceType.BOTH else "both"
+            try:
+                db_results = search_parts(criteria.search_query, appliance_type)
+            except Exception as e:
+                logger.warning(f"Database search failed: {str(e)}")
+                db_results = {"found": False}
+            web_results = search_partselect_web(criteria.search_query, appliance_type)
             
+            # 1. Local database results
             if db_results.get("found"):
                 for part in db_results.get("results", []):
                     search_results.append(PartInfo(
@@ -224,12 +313,7 @@ class ProductSearchAgent(BaseSpecializedAgent):
                         oem_compatible=True
                     ))
             
-            # 2. Search PartSelect web
-            web_results = await search_partselect_web(
-                criteria.search_query,
-                criteria.appliance_type.value if criteria.appliance_type != ApplianceType.BOTH else "both"
-            )
-            
+            # 2. PartSelect web results
             if web_results.get("found"):
                 for result in web_results.get("results", []):
                     partselect_links.append(result["url"])
@@ -247,11 +331,11 @@ class ProductSearchAgent(BaseSpecializedAgent):
             # Generate response message
             message = self._format_search_response(result, partselect_links)
             
-            return AgentResponse(
+            return AgentResponse.trusted(
                 agent_name=self.name,
                 success=result.found,
                 message=message,
-                data=result.dict(),
+                data=result.model_dump(mode="python", exclude_none=True),
                 confidence=ConfidenceLevel.HIGH if result.found else ConfidenceLevel.LOW,
                 suggestions=result.suggestions,
                 partselect_links=partselect_links,
@@ -261,7 +345,7 @@ class ProductSearchAgent(BaseSpecializedAgent):
             
         except Exception as e:
             logger.error(f"Error in ProductSearchAgent: {str(e)}")
-            return AgentResponse(
+            return AgentResponse.trusted(
                 agent_name=self.name,
                 success=False,
                 message=f"I encountered an error while searching for parts: {str(e)}",
@@ -278,13 +362,8 @@ class ProductSearchAgent(BaseSpecializedAgent):
             entities = classification.extracted_entities
         else:
             # Basic extraction
-            appliance_type = ApplianceType.BOTH
+            appliance_type = _guess_appliance_type(query)
             entities = {}
-            
-            if "refrigerator" in query.lower() or "fridge" in query.lower():
-                appliance_type = ApplianceType.REFRIGERATOR
-            elif "dishwasher" in query.lower():
-                appliance_type = ApplianceType.DISHWASHER
         
         return PartSearchCriteria(
             search_query=query,
@@ -307,34 +386,30 @@ class ProductSearchAgent(BaseSpecializedAgent):
         
         return suggestions
     
-    def _get_related_categories(self, appliance_type: ApplianceType) -> List[str]:
+    def _get_related_categories(self, appliance_type: ApplianceType) -> Tuple[str, ...]:
         """Get related part categories"""
-        if appliance_type == ApplianceType.REFRIGERATOR:
-            return ["Filters", "Handles", "Shelves", "Ice Makers", "Motors"][:5]
-        elif appliance_type == ApplianceType.DISHWASHER:
-            return ["Racks", "Filters", "Spray Arms", "Pumps", "Latches"][:5]
-        else:
-            return ["Filters", "Handles", "Motors", "Pumps", "Racks"][:5]
+        return _RELATED_CATEGORIES.get(appliance_type, _DEFAULT_RELATED_CATEGORIES)
     
     def _format_search_response(self, result: PartSearchResult, partselect_links: List[str]) -> str:
         """Format the search response message"""
         if not result.found:
             return f"I couldn't find specific parts matching '{result.search_criteria.search_query}'. {' '.join(result.suggestions)}"
         
-        message = f"I found {result.count} parts for your search:\n\n"
+        parts = [f"I found {result.count} parts for your search:\n\n"]
         
         for i, part in enumerate(result.parts[:3], 1):  # Show top 3
-            message += f"{i}. **{part.name}** (Part #{part.part_number})\n"
-            message += f"   - Price: ${part.price:.2f}\n"
-            message += f"   - {part.description}\n"
-            message += f"   - {'In Stock' if part.in_stock else 'Out of Stock'}\n\n"
+            parts.append(
+                f"{i}. **{part.name}** (Part #{part.part_number})\n"
+                f"   - Price: ${part.price:.2f}\n"
+                f"   - {part.description}\n"
+                f"   - {'In Stock' if part.in_stock else 'Out of Stock'}\n\n"
+            )
         
         if partselect_links:
-            message += "**Relevant PartSelect Pages:**\n"
-            for i, link in enumerate(partselect_links[:3], 1):
-                message += f"{i}. {link}\n"
+            parts.append("**Relevant PartSelect Pages:**\n")
+            parts.extend(f"{i}. {link}\n" for i, link in enumerate(partselect_links[:3], 1))
         
-        return message
+        return "".join(parts)
     
     def _generate_followup_questions(self, criteria: PartSearchCriteria) -> List[str]:
         """Generate follow-up questions"""
@@ -354,8 +429,8 @@ class ProductSearchAgent(BaseSpecializedAgent):
 class ModelLookupAgent(BaseSpecializedAgent):
     """Specialized agent for model number lookup and validation"""
     
-    def __init__(self, client: OpenAI, model: str = "deepseek-chat"):
-        super().__init__("ModelLookupAgent", client, model)
+    def __init__(self, model: str = "deepseek-chat"):
+        super().__init__("ModelLookupAgent", model)
     
     async def process(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
         """Look up model information"""
@@ -364,7 +439,7 @@ class ModelLookupAgent(BaseSpecializedAgent):
             model_numbers = self._extract_model_numbers(query)
             
             if not model_numbers:
-                return AgentResponse(
+                return AgentResponse.trusted(
                     agent_name=self.name,
                     success=False,
                     message="I couldn't find a valid model number in your query. Could you please provide the model number?",
@@ -373,35 +448,34 @@ class ModelLookupAgent(BaseSpecializedAgent):
                     followup_questions=["What's the model number of your appliance?"]
                 )
             
-            # Validate each model number
+            validations = [validate_model_number(model) for model in model_numbers]
+            
             results = []
             partselect_links = []
-            
-            for model in model_numbers:
-                validation = await validate_model_number(model)
+            for validation in validations:
+                if not validation.get("valid"):
+                    continue
+                appliance_type = validation.get("appliance_type", "unknown")
                 
-                if validation.get("valid"):
-                    appliance_type = validation.get("appliance_type", "unknown")
-                    
-                    model_info = ModelValidation(
-                        is_valid=True,
-                        model_number=validation["model"],
-                        appliance_type=ApplianceType(appliance_type) if appliance_type in ["refrigerator", "dishwasher"] else ApplianceType.BOTH,
-                        confidence=ConfidenceLevel(validation.get("confidence", "medium")),
-                        partselect_url=validation.get("url"),
-                        validation_notes=validation.get("notes", [])
-                    )
-                    
-                    results.append(model_info)
-                    if validation.get("url"):
-                        partselect_links.append(validation["url"])
+                model_info = ModelValidation(
+                    is_valid=True,
+                    model_number=validation["model"],
+                    appliance_type=ApplianceType(appliance_type) if appliance_type in ["refrigerator", "dishwasher"] else ApplianceType.BOTH,
+                    confidence=ConfidenceLevel(validation.get("confidence", "medium")),
+                    partselect_url=validation.get("url"),
+                    validation_notes=validation.get("notes", [])
+                )
+                
+                results.append(model_info)
+                if validation.get("url"):
+                    partselect_links.append(validation["url"])
             
             # Get popular models if validation successful
             similar_models = []
             if results:
                 main_result = results[0]
                 if main_result.appliance_type != ApplianceType.BOTH:
-                    popular_result = await get_popular_models(main_result.appliance_type.value, limit=5)
+                    popular_result = get_popular_models(main_result.appliance_type.value, limit=5)
                     if popular_result.get("found"):
                         for model_data in popular_result.get("models", []):
                             similar_models.append(PopularModel(
@@ -413,25 +487,30 @@ class ModelLookupAgent(BaseSpecializedAgent):
             # Create response
             if results:
                 main_result = results[0]
-                message = f"✅ **Model {main_result.model_number}** is a valid {main_result.appliance_type.value} model.\n\n"
-                message += f"**PartSelect Page:** {main_result.partselect_url}\n\n"
+                message_parts = [
+                    f"✅ **Model {main_result.model_number}** is a valid {main_result.appliance_type.value} model.\n\n",
+                    f"**PartSelect Page:** {main_result.partselect_url}\n\n",
+                ]
                 
                 if similar_models:
-                    message += "**Similar Popular Models:**\n"
-                    for model in similar_models[:3]:
-                        message += f"- {model.model_number}\n"
+                    message_parts.append("**Similar Popular Models:**\n")
+                    message_parts.extend(f"- {model.model_number}\n" for model in similar_models[:3])
+                message = "".join(message_parts)
                 
-                return AgentResponse(
+                return AgentResponse.trusted(
                     agent_name=self.name,
                     success=True,
                     message=message,
-                    data={"model_info": main_result.dict(), "similar_models": [m.dict() for m in similar_models]},
+                    data={
+                        "model_info": main_result.model_dump(mode="python", exclude_none=True),
+                        "similar_models": [m.model_dump(mode="python", exclude_none=True) for m in similar_models]
+                    },
                     confidence=main_result.confidence,
                     partselect_links=partselect_links,
                     suggestions=["You can now search for parts for this model", "Check installation guides for specific parts"]
                 )
             else:
-                return AgentResponse(
+                return AgentResponse.trusted(
                     agent_name=self.name,
                     success=False,
                     message="I couldn't validate the model number you provided. Please double-check the model number.",
@@ -442,7 +521,7 @@ class ModelLookupAgent(BaseSpecializedAgent):
                 
         except Exception as e:
             logger.error(f"Error in ModelLookupAgent: {str(e)}")
-            return AgentResponse(
+            return AgentResponse.trusted(
                 agent_name=self.name,
                 success=False,
                 message=f"I encountered an error while looking up the model: {str(e)}",
@@ -450,34 +529,14 @@ class ModelLookupAgent(BaseSpecializedAgent):
             )
     
     def _extract_model_numbers(self, query: str) -> List[str]:
-        """Extract potential model numbers from query"""
-        # Look for patterns that look like model numbers
-        patterns = [
-            r'\b[A-Z]{2,}[0-9]{3,}[A-Z0-9]*\b',  # Letters followed by numbers
-            r'\b[0-9]{3,}[A-Z]{2,}[A-Z0-9]*\b',  # Numbers followed by letters
-            r'\b[A-Z0-9]{6,15}\b'  # General alphanumeric 6-15 chars
-        ]
-        
-        models = []
-        for pattern in patterns:
-            matches = re.findall(pattern, query.upper())
-            models.extend(matches)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_models = []
-        for model in models:
-            if model not in seen:
-                seen.add(model)
-                unique_models.append(model)
-        
-        return unique_models
+        """Extract potential model numbers from query (deduplicated, in order of appearance)"""
+        return list(_extract_model_numbers(query))
 
 class WebSearchAgent(BaseSpecializedAgent):
     """Specialized agent for web search on PartSelect"""
     
-    def __init__(self, client: OpenAI, model: str = "deepseek-chat"):
-        super().__init__("WebSearchAgent", client, model)
+    def __init__(self, model: str = "deepseek-chat"):
+        super().__init__("WebSearchAgent", model)
     
     async def process(self, query: str, context: Dict[str, Any] = None) -> AgentResponse:
         """Perform web search and return results"""
@@ -489,19 +548,22 @@ class WebSearchAgent(BaseSpecializedAgent):
                 appliance_type = classification.appliance_type.value
             
             # Perform web search
-            search_results = await search_partselect_web(query, appliance_type)
+            search_results = search_partselect_web(query, appliance_type)
             
             if search_results.get("found"):
-                message = f"I found {search_results['count']} relevant results on PartSelect:\n\n"
+                message_parts = [f"I found {search_results['count']} relevant results on PartSelect:\n\n"]
                 
                 partselect_links = []
                 for i, result in enumerate(search_results.get("results", [])[:5], 1):
-                    message += f"{i}. **{result['title']}**\n"
-                    message += f"   {result['snippet']}\n"
-                    message += f"   🔗 {result['url']}\n\n"
+                    message_parts.append(
+                        f"{i}. **{result['title']}**\n"
+                        f"   {result['snippet']}\n"
+                        f"   🔗 {result['url']}\n\n"
+                    )
                     partselect_links.append(result["url"])
+                message = "".join(message_parts)
                 
-                return AgentResponse(
+                return AgentResponse.trusted(
                     agent_name=self.name,
                     success=True,
                     message=message,
@@ -511,7 +573,7 @@ class WebSearchAgent(BaseSpecializedAgent):
                     suggestions=["Click the links above to browse parts", "Use model numbers for more specific results"]
                 )
             else:
-                return AgentResponse(
+                return AgentResponse.trusted(
                     agent_name=self.name,
                     success=False,
                     message="I couldn't find specific results for your query on PartSelect. Try using different search terms.",
@@ -522,7 +584,7 @@ class WebSearchAgent(BaseSpecializedAgent):
                 
         except Exception as e:
             logger.error(f"Error in WebSearchAgent: {str(e)}")
-            return AgentResponse(
+            return AgentResponse.trusted(
                 agent_name=self.name,
                 success=False,
                 message=f"I encountered an error during web search: {str(e)}",
@@ -532,15 +594,20 @@ class WebSearchAgent(BaseSpecializedAgent):
 class MultiAgentOrchestrator:
     """Main orchestrator for the multi-agent system"""
     
-    def __init__(self, client: OpenAI, model: str = "deepseek-chat"):
+    def __init__(self, 
+                 client: AsyncOpenAI, 
+                 model: str = "deepseek-chat", 
+                 max_concurrency: Optional[int] = None,
+                 batch_classification: bool = False):
         self.client = client
         self.model = model
         
-        # Initialize specialized agents
-        self.triaging_agent = TriagingAgent(client, model)
-        self.product_search_agent = ProductSearchAgent(client, model)
-        self.model_lookup_agent = ModelLookupAgent(client, model)
-        self.web_search_agent = WebSearchAgent(client, model)
+        # Initialize specialized agents, all sharing this client
+        BaseSpecializedAgent.set_client(client)
+        self.triaging_agent = TriagingAgent(model)
+        self.product_search_agent = ProductSearchAgent(model)
+        self.model_lookup_agent = ModelLookupAgent(model)
+        self.web_search_agent = WebSearchAgent(model)
         
         # Agent registry
         self.agents = {
@@ -549,13 +616,34 @@ class MultiAgentOrchestrator:
             "ModelLookupAgent": self.model_lookup_agent,
             "WebSearchAgent": self.web_search_agent
         }
+        
+        # Give this orchestrator its own LLM concurrency limit instead of the module-wide one
+        if max_concurrency:
+            semaphore = asyncio.Semaphore(max_concurrency)
+            for agent in self.agents.values():
+                agent.llm_semaphore = semaphore
+        
+        # Opt-in: classify concurrent queries in shared LLM calls
+        self.batching_classifier = BatchingClassifier(self.triaging_agent) if batch_classification else None
     
     async def process_query(self, query: str, conversation_context: Dict[str, Any] = None) -> FinalResponse:
         """Process a user query through the multi-agent system"""
         try:
             # Step 1: Classify and route the query
-            classification = await self.triaging_agent.classify_query(query, conversation_context)
-            routing = await self.triaging_agent.route_query(classification)
+            if self.batching_classifier:
+                classification = await self.batching_classifier.submit(query, conversation_context)
+            else:
+                classification = await self.triaging_agent.classify_query(query, conversation_context)
+            routing = self.triaging_agent.route_query(classification)
+            
+            if classification.query_type == QueryType.OUT_OF_SCOPE:
+                return FinalResponse.trusted(
+                    message=OUT_OF_SCOPE_MESSAGE,
+                    response_type=QueryType.OUT_OF_SCOPE,
+                    appliance_type=classification.appliance_type,
+                    confidence_level=classification.confidence,
+                    followup_needed=False
+                )
             
             # Step 2: Prepare context for agents
             agent_context = {
@@ -575,23 +663,29 @@ class MultiAgentOrchestrator:
             secondary_responses = []
             if routing.secondary_agents and not primary_response.success:
                 if routing.parallel_execution:
-                    # Parallel execution
-                    tasks = []
-                    for agent_name in routing.secondary_agents:
-                        agent = self.agents.get(agent_name)
-                        if agent:
-                            tasks.append(agent.process(query, agent_context))
-                    
-                    if tasks:
-                        secondary_responses = await asyncio.gather(*tasks, return_exceptions=True)
-                        # Filter out exceptions
-                        secondary_responses = [r for r in secondary_responses if isinstance(r, AgentResponse)]
+                    # Parallel execution; the first successful response wins and the rest are cancelled
+                    tasks = [
+                        asyncio.create_task(self.agents[agent_name].process(query, agent_context))
+                        for agent_name in routing.secondary_agents
+                        if agent_name in self.agents
+                    ]
+                    try:
+                        for next_done in asyncio.as_completed(tasks):
+                            try:
+                                response = await next_done
+                            except Exception as e:
+                                logger.warning(f"Secondary agent failed: {str(e)}")
+                                continue
+                            secondary_responses.append(response)
+                            if response.success:
+                                break
+                    finally:
+                        self._cancel_tasks(tasks)
                 else:
                     # Sequential execution
                     for agent_name in routing.secondary_agents:
-                        agent = self.agents.get(agent_name)
-                        if agent:
-                            response = await agent.process(query, agent_context)
+                        if agent_name in self.agents:
+                            response = await self.agents[agent_name].process(query, agent_context)
                             secondary_responses.append(response)
                             if response.success:
                                 break  # Stop if we get a successful response
@@ -605,13 +699,19 @@ class MultiAgentOrchestrator:
             
         except Exception as e:
             logger.error(f"Error in MultiAgentOrchestrator: {str(e)}")
-            return FinalResponse(
+            return FinalResponse.trusted(
                 message=f"I encountered an error processing your request: {str(e)}",
                 response_type=QueryType.GENERAL_INFO,
                 confidence_level=ConfidenceLevel.LOW,
                 followup_needed=True
             )
     
+    @staticmethod
+    def _cancel_tasks(tasks) -> None:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    
     def _consolidate_responses(self, 
                              query: str, 
                              classification: QueryClassification,
@@ -634,31 +734,18 @@ class MultiAgentOrchestrator:
             if not main_response:
                 main_response = primary_response
         
-        # Collect all PartSelect links
-        all_links = set(main_response.partselect_links)
-        for response in secondary_responses:
-            all_links.update(response.partselect_links)
-        
-        # Collect all suggestions
-        all_suggestions = list(main_response.suggestions)
-        for response in secondary_responses:
-            all_suggestions.extend(response.suggestions)
-        
-        # Remove duplicates while preserving order
-        seen_suggestions = set()
-        unique_suggestions = []
-        for suggestion in all_suggestions:
-            if suggestion not in seen_suggestions:
-                seen_suggestions.add(suggestion)
-                unique_suggestions.append(suggestion)
+        # Collect all PartSelect links and suggestions, deduplicated in order of appearance
+        all_responses = (main_response, *secondary_responses)
+        all_links = list(dict.fromkeys(chain.from_iterable(r.partselect_links for r in all_responses)))
+        unique_suggestions = list(dict.fromkeys(chain.from_iterable(r.suggestions for r in all_responses)))
         
-        return FinalResponse(
+        return FinalResponse.trusted(
             message=main_response.message,
             response_type=classification.query_type,
             appliance_type=classification.appliance_type,
             key_information=main_response.data or {},
             recommended_actions=unique_suggestions,
-            partselect_links=list(all_links),
+            partselect_links=all_links,
             confidence_level=main_response.confidence,
             followup_needed=main_response.requires_followup,
             disclaimer="Please verify part compatibility and follow safety guidelines when working with appliances."
@@ -1,11 +1,18 @@
-from typing import Dict, Any, List
-import json
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
+import asyncio
+import orjson
+from collections import OrderedDict
 from datetime import datetime
 import logging
+import re
+from functools import lru_cache
+from itertools import islice
 from .base_agent import BaseAgent
+from .llm_client import LLMBatcher, get_async_client
+from .response_cache import ResponseCache, make_cache_key
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
 
 from .tools import (
     search_parts, 
@@ -16,7 +23,7 @@ from .tools import (
 )
 from utils.prompts import PARTS_AGENT_SYSTEM_PROMPT
 from .hallucination_guardrail import HallucinationGuardrail, GuardrailAction
-from .multi_agent_system import MultiAgentOrchestrator
+from .multi_agent_system import MultiAgentOrchestrator, OUT_OF_SCOPE_MESSAGE
 from .partselect_web_tools import (
     search_partselect_web,
     get_partselect_url,
@@ -30,6 +37,272 @@ from .partselect_web_tools import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Context of the turn being processed (tools used, parts found) for the guardrail. The agent is shared
+# by concurrent turns, so this is per task rather than an instance attribute
+_TURN_CONTEXT: ContextVar[Optional[Dict[str, Any]]] = ContextVar("parts_agent_turn_context", default=None)
+
+# Guardrail actions compared on every logged evaluation, bound once
+_ACTION_BLOCK = GuardrailAction.BLOCK
+_ACTION_WARN = GuardrailAction.WARN
+
+# Scope keywords, matched as whole words (plurals included) in one pass each.
+# In-scope mentions win, so "dishwasher" never trips the out-of-scope "washer".
+_IN_SCOPE_RE = re.compile(
+    r"\b(?:refrigerator|fridge|dishwasher|dish washer|ice maker|freezer|cooling|chiller)(?:s|es)?\b",
+    re.IGNORECASE
+)
+_OUT_OF_SCOPE_RE = re.compile(
+    r"\b(?:oven|stove|range|microwave|washer|washing machine|dryer|air conditioner|ac|heater|furnace|"
+    r"vacuum|blender|toaster|coffee maker|grill|cooktop)(?:s|es)?\b",
+    re.IGNORECASE
+)
+
+# Part/model-number-shaped tokens in a response, for guardrail context
+_PART_NUMBER_RE = re.compile(r"\b[A-Z0-9]{6,12}\b")
+
+# Part/model numbers in a user message (alphanumeric tokens containing a digit), and wording that
+# signals a multi-step question; together they decide whether the orchestrator is worth its latency
+_IDENTIFIER_RE = re.compile(r"\b(?=[A-Za-z0-9]*\d)[A-Za-z0-9]{5,15}\b")
+_MULTI_STEP_CUE_RE = re.compile(
+    r"\b(?:and also|as well as|compare|comparing|comparison|versus|vs|both|difference between|which is better)\b",
+    re.IGNORECASE
+)
+
+# Tool name -> (function, parameters it accepts); anything else the model sends is dropped
+# (every tool is a plain function doing in-memory lookups, so it is called inline on the event loop)
+_TOOL_REGISTRY: Dict[str, Tuple[Callable[..., Any], frozenset]] = {
+    "search_parts": (search_parts, frozenset({"query", "appliance_type"})),
+    "search_partselect_web": (search_partselect_web, frozenset({"query", "appliance_type"})),
+    "validate_model_number": (validate_model_number, frozenset({"model", "appliance_type"})),
+    "get_popular_models": (get_popular_models, frozenset({"appliance_type", "limit"})),
+    "get_part_categories": (get_part_categories, frozenset({"appliance_type"})),
+    "get_brands": (get_brands, frozenset({"appliance_type"})),
+    "check_compatibility": (check_compatibility, frozenset({"part_number", "model_number"})),
+    "get_installation_guide": (get_installation_guide, frozenset({"part_number"})),
+    "get_troubleshooting_guide": (get_troubleshooting_guide, frozenset({"issue", "appliance_type"})),
+    "get_part_details": (get_part_details, frozenset({"part_number"})),
+}
+
+# Read-only tools whose results are cached per argument set -> TTL cap in seconds (None = TOOL_CACHE_TTL);
+# web search results go stale faster than the static lookups
+_CACHED_TOOLS: Dict[str, Optional[float]] = {
+    "validate_model_number": None,
+    "get_popular_models": None,
+    "get_part_categories": None,
+    "get_brands": None,
+    "get_installation_guide": None,
+    "get_part_details": None,
+    "search_partselect_web": 60.0,
+}
+
+# Tool definitions sent with every completion; built once at import and shared by every PartsAgent
+_TOOLS_SCHEMA: List[Dict] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_parts",
+            "description": "Search for refrigerator or dishwasher parts by keyword, model number, or part number",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Search query (part name, number, or model)"
+                    },
+                    "appliance_type": {
+                        "type": "string",
+                        "enum": ["refrigerator", "dishwasher", "both"],
+                        "description": "Type of appliance",
+                        "default": "both"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_partselect_web",
+            "description": "Search PartSelect website for parts, models, brands, and categories",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Search query for PartSelect website"
+                    },
+                    "appliance_type": {
+                        "type": "string",
+                        "enum": ["refrigerator", "dishwasher", "both"],
+                        "description": "Type of appliance",
+                        "default": "both"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "validate_model_number",
+            "description": "Validate if a model number exists and get its PartSelect page",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "model": {
+                        "type": "string",
+                        "description": "Model number to validate"
+                    },
+                    "appliance_type": {
+                        "type": "string",
+                        "enum": ["refrigerator", "dishwasher"],
+                        "description": "Type of appliance (optional)"
+                    }
+                },
+                "required": ["model"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_popular_models",
+            "description": "Get popular models for a specific appliance type",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "appliance_type": {
+                        "type": "string",
+                        "enum": ["refrigerator", "dishwasher"],
+                        "description": "Type of appliance"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Number of models to return (default: 10)",
+                        "default": 10
+                    }
+                },
+                "required": ["appliance_type"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_part_categories",
+            "description": "Get available part categories for an appliance type",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "appliance_type": {
+                        "type": "string",
+                        "enum": ["refrigerator", "dishwasher"],
+                        "description": "Type of appliance"
+                    }
+                },
+                "required": ["appliance_type"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_brands",
+            "description": "Get available brands, optionally filtered by appliance type",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "appliance_type": {
+                        "type": "string",
+                        "enum": ["refrigerator", "dishwasher"],
+                        "description": "Type of appliance (optional)"
+                    }
+                },
+                "required": []
+            }
+        }
+    },
+    {
+        "type": "function", 
+        "function": {
+            "name": "check_compatibility",
+            "description": "Check if a part is compatible with a specific appliance model",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "part_number": {
+                        "type": "string",
+                        "description": "Part number to check"
+                    },
+                    "model_number": {
+                        "type": "string", 
+                        "description": "Appliance model number"
+                    }
+                },
+                "required": ["part_number", "model_number"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_installation_guide",
+            "description": "Get installation instructions for a specific part",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "part_number": {
+                        "type": "string",
+                        "description": "Part number"
+                    }
+                },
+                "required": ["part_number"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_troubleshooting_guide", 
+            "description": "Get troubleshooting guide for common appliance issues",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "issue": {
+                        "type": "string",
+                        "description": "Description of the issue"
+                    },
+                    "appliance_type": {
+                        "type": "string",
+                        "enum": ["refrigerator", "dishwasher"],
+                        "description": "Type of appliance"
+                    }
+                },
+                "required": ["issue", "appliance_type"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_part_details",
+            "description": "Get detailed information about a specific part",
+            "parameters": {
+                "type": "object", 
+                "properties": {
+                    "part_number": {
+                        "type": "string",
+                        "description": "Part number"
+                    }
+                },
+                "required": ["part_number"]
+            }
+        }
+    }
+]
+
 class PartsAgent(BaseAgent):
     """Agent specialized in refrigerator and dishwasher parts"""
     
@@ -39,326 +312,154 @@ class PartsAgent(BaseAgent):
         
         deepseek_key = os.getenv("DEEPSEEK_API_KEY")
         openai_key = os.getenv("OPENAI_API_KEY")
+        response_cache_ttl = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+        # Feature flags are resolved once here rather than on every message
+        performance_mode = os.getenv("PERFORMANCE_MODE", "true").lower() == "true"  # Default to true for best user experience
 
         if deepseek_key:
             model = "deepseek-chat"
-            super().__init__(name="PartSelect Assistant", model=model)
-            self.client = OpenAI(
+            super().__init__(name="PartSelect Assistant", model=model, response_cache_ttl=response_cache_ttl)
+            self.client = get_async_client(
                 api_key=deepseek_key,
                 base_url="https://api.deepseek.com"
             )
             logger.info("Using DeepSeek API.")
         elif openai_key:
             model = "gpt-4o-mini"
-            super().__init__(name="PartSelect Assistant", model=model)
-            self.client = OpenAI(api_key=openai_key)
+            super().__init__(name="PartSelect Assistant", model=model, response_cache_ttl=response_cache_ttl)
+            self.client = get_async_client(api_key=openai_key)
+            # DeepSeek caches repeated prefixes automatically; OpenAI needs an explicit key
+            self.prompt_cache_key = f"{self.name}:v1"
             logger.info("Using OpenAI API as a fallback.")
         else:
             raise ValueError("API key not found. Please set either DEEPSEEK_API_KEY or OPENAI_API_KEY in your .env file.")
         
-        # Initialize hallucination guardrail (only if DeepSeek key is available)
+        self.performance_mode = performance_mode
+        
+        # Coalesce completions from concurrent turns into paced windows (0 = send immediately)
+        llm_batch_window_ms = float(os.getenv("LLM_BATCH_WINDOW_MS", "0"))
+        if llm_batch_window_ms > 0:
+            self.llm_batcher = LLMBatcher(self.client, flush_interval=llm_batch_window_ms / 1000)
+            logger.info("LLM request batching enabled (%sms window).", llm_batch_window_ms)
+        # TTL caches for read-only tool lookups, one per tool; a TTL of 0 disables them
+        tool_cache_ttl = float(os.getenv("TOOL_CACHE_TTL", "600"))
+        self.tool_caches: Dict[str, ResponseCache] = {}
+        if tool_cache_ttl > 0:
+            self.tool_caches = {
+                name: ResponseCache(maxsize=1024, ttl=min(tool_cache_ttl, ttl_cap or tool_cache_ttl))
+                for name, ttl_cap in _CACHED_TOOLS.items()
+            }
+        # Guardrail summaries of tool results, keyed by (tool, result identity); see _summarize_tool_result
+        self._summary_cache: "OrderedDict[Tuple[str, int], Tuple[Any, str]]" = OrderedDict()
+        
+        # Paraphrase-tolerant answer cache for opening questions (needs an OpenAI key for embeddings)
+        if os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true":
+            if openai_key and response_cache_ttl > 0:
+                from .semantic_cache import SemanticCache
+                self.semantic_cache = SemanticCache(
+                    get_async_client(api_key=openai_key),
+                    embedding_model=os.getenv("SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-3-small"),
+                    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93")),
+                    ttl=response_cache_ttl
+                )
+                logger.info("Semantic response cache enabled.")
+            else:
+                logger.warning("Semantic response cache requires OPENAI_API_KEY and RESPONSE_CACHE_TTL > 0; leaving it disabled.")
+        
+        # Performance mode never consults the guardrail or orchestrator, so don't build them
         self.guardrail = None
-        if deepseek_key:
-            try:
-                # Configure guardrail settings
-                guardrail_threshold = float(os.getenv("GUARDRAIL_THRESHOLD", "0.7"))
-                guardrail_enabled = os.getenv("GUARDRAIL_ENABLED", "false").lower() == "true"  # Default to false for better performance
+        self._audit_task: Optional[asyncio.Task] = None
+        self.multi_agent_orchestrator = None
+        if performance_mode:
+            logger.info("Performance mode enabled - guardrail and multi-agent orchestrator skipped.")
+        else:
+            # Initialize hallucination guardrail (only if DeepSeek key is available)
+            if deepseek_key:
+                try:
+                    # Configure guardrail settings
+                    guardrail_threshold = float(os.getenv("GUARDRAIL_THRESHOLD", "0.7"))
+                    guardrail_enabled = os.getenv("GUARDRAIL_ENABLED", "false").lower() == "true"  # Default to false for better performance
                 
-                if guardrail_enabled:
-                    self.guardrail = HallucinationGuardrail(
-                        api_key=deepseek_key,
-                        threshold=guardrail_threshold,
-                        action=GuardrailAction.WARN  # Default to warn
+                    if guardrail_enabled:
+                        self.guardrail = HallucinationGuardrail(
+                            api_key=deepseek_key,
+                            threshold=guardrail_threshold,
+                            action=GuardrailAction.WARN,  # Default to warn
+                            cache_ttl=response_cache_ttl,
+                            flush_interval_ms=float(os.getenv("GUARDRAIL_BATCH_INTERVAL_MS", "0")),  # 0 = no batching
+                            enable_prefilter=os.getenv("GUARDRAIL_PREFILTER", "true").lower() == "true",
+                            fast_model=os.getenv("DEEPSEEK_GUARDRAIL_FAST_MODEL") or None,  # Unset = no triage tier
+                            # Tool results are audited offline through the OpenAI Batch API when enabled
+                            audit_api_key=openai_key if os.getenv("GUARDRAIL_AUDIT_ENABLED", "false").lower() == "true" else None,
+                            audit_redis_url=os.getenv("REDIS_URL")
+                        )
+                        logger.info("Hallucination guardrail initialized.")
+                    else:
+                        logger.info("Hallucination guardrail disabled by configuration.")
+                except Exception as e:
+                    logger.warning("Failed to initialize guardrail: %s. Continuing without guardrail.", e)
+                    self.guardrail = None
+            else:
+                logger.info("Guardrail not available - DeepSeek API key required.")
+        
+            # Initialize multi-agent orchestrator for advanced query handling
+            try:
+                use_multi_agent = os.getenv("USE_MULTI_AGENT", "false").lower() == "true"  # Default to false for better performance
+                if use_multi_agent and deepseek_key:
+                    self.multi_agent_orchestrator = MultiAgentOrchestrator(
+                        self.client,
+                        self.model,
+                        max_concurrency=int(os.getenv("MULTI_AGENT_MAX_CONCURRENCY", "0")) or None,  # 0 = shared default (8)
+                        batch_classification=os.getenv("MULTI_AGENT_BATCH_CLASSIFY", "false").lower() == "true"
                     )
-                    logger.info("Hallucination guardrail initialized.")
+                    logger.info("Multi-agent orchestrator initialized.")
                 else:
-                    logger.info("Hallucination guardrail disabled by configuration.")
+                    self.multi_agent_orchestrator = None
+                    logger.info("Multi-agent orchestrator disabled for better performance.")
             except Exception as e:
-                logger.warning(f"Failed to initialize guardrail: {str(e)}. Continuing without guardrail.")
-                self.guardrail = None
-        else:
-            logger.info("Guardrail not available - DeepSeek API key required.")
-        
-        # Initialize multi-agent orchestrator for advanced query handling
-        try:
-            use_multi_agent = os.getenv("USE_MULTI_AGENT", "false").lower() == "true"  # Default to false for better performance
-            if use_multi_agent and deepseek_key:
-                self.multi_agent_orchestrator = MultiAgentOrchestrator(self.client, self.model)
-                logger.info("Multi-agent orchestrator initialized.")
-            else:
+                logger.warning("Failed to initialize multi-agent orchestrator: %s", e)
                 self.multi_agent_orchestrator = None
-                logger.info("Multi-agent orchestrator disabled for better performance.")
-        except Exception as e:
-            logger.warning(f"Failed to initialize multi-agent orchestrator: {str(e)}")
-            self.multi_agent_orchestrator = None
 
-    def get_system_prompt(self) -> str:
+    def _build_system_prompt(self) -> str:
         return PARTS_AGENT_SYSTEM_PROMPT
     
-    def get_tools(self) -> List[Dict]:
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_parts",
-                    "description": "Search for refrigerator or dishwasher parts by keyword, model number, or part number",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "Search query (part name, number, or model)"
-                            },
-                            "appliance_type": {
-                                "type": "string",
-                                "enum": ["refrigerator", "dishwasher", "both"],
-                                "description": "Type of appliance",
-                                "default": "both"
-                            }
-                        },
-                        "required": ["query"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_partselect_web",
-                    "description": "Search PartSelect website for parts, models, brands, and categories",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "Search query for PartSelect website"
-                            },
-                            "appliance_type": {
-                                "type": "string",
-                                "enum": ["refrigerator", "dishwasher", "both"],
-                                "description": "Type of appliance",
-                                "default": "both"
-                            }
-                        },
-                        "required": ["query"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "validate_model_number",
-                    "description": "Validate if a model number exists and get its PartSelect page",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "model": {
-                                "type": "string",
-                                "description": "Model number to validate"
-                            },
-                            "appliance_type": {
-                                "type": "string",
-                                "enum": ["refrigerator", "dishwasher"],
-                                "description": "Type of appliance (optional)"
-                            }
-                        },
-                        "required": ["model"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_popular_models",
-                    "description": "Get popular models for a specific appliance type",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "appliance_type": {
-                                "type": "string",
-                                "enum": ["refrigerator", "dishwasher"],
-                                "description": "Type of appliance"
-                            },
-                            "limit": {
-                                "type": "integer",
-                                "description": "Number of models to return (default: 10)",
-                                "default": 10
-                            }
-                        },
-                        "required": ["appliance_type"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_part_categories",
-                    "description": "Get available part categories for an appliance type",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "appliance_type": {
-                                "type": "string",
-                                "enum": ["refrigerator", "dishwasher"],
-                                "description": "Type of appliance"
-                            }
-                        },
-                        "required": ["appliance_type"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_brands",
-                    "description": "Get available brands, optionally filtered by appliance type",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "appliance_type": {
-                                "type": "string",
-                                "enum": ["refrigerator", "dishwasher"],
-                                "description": "Type of appliance (optional)"
-                            }
-                        },
-                        "required": []
-                    }
-                }
-            },
-            {
-                "type": "function", 
-                "function": {
-                    "name": "check_compatibility",
-                    "description": "Check if a part is compatible with a specific appliance model",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "part_number": {
-                                "type": "string",
-                                "description": "Part number to check"
-                            },
-                            "model_number": {
-                                "type": "string", 
-                                "description": "Appliance model number"
-                            }
-                        },
-                        "required": ["part_number", "model_number"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_installation_guide",
-                    "description": "Get installation instructions for a specific part",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "part_number": {
-                                "type": "string",
-                                "description": "Part number"
-                            }
-                        },
-                        "required": ["part_number"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_troubleshooting_guide", 
-                    "description": "Get troubleshooting guide for common appliance issues",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "issue": {
-                                "type": "string",
-                                "description": "Description of the issue"
-                            },
-                            "appliance_type": {
-                                "type": "string",
-                                "enum": ["refrigerator", "dishwasher"],
-                                "description": "Type of appliance"
-                            }
-                        },
-                        "required": ["issue", "appliance_type"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_part_details",
-                    "description": "Get detailed information about a specific part",
-                    "parameters": {
-                        "type": "object", 
-                        "properties": {
-                            "part_number": {
-                                "type": "string",
-                                "description": "Part number"
-                            }
-                        },
-                        "required": ["part_number"]
-                    }
-                }
-            }
-        ]
-        
-        return tools
+    def _build_tools(self) -> List[Dict]:
+        return _TOOLS_SCHEMA
+    
+    async def prewarm(self):
+        await super().prewarm()
+        # Start the offline guardrail audit loop (submits queued tool-result evaluations, collects results)
+        if self.guardrail and self.guardrail.audit_client and self._audit_task is None:
+            interval = float(os.getenv("GUARDRAIL_AUDIT_INTERVAL", "600"))
+            self._audit_task = asyncio.create_task(self.guardrail.run_audits(interval))
+            logger.info("Guardrail Batch API audits enabled (every %ss).", interval)
+    
+    async def close(self):
+        if self._audit_task is not None:
+            self._audit_task.cancel()
+            self._audit_task = None
+        if self.guardrail:
+            await self.guardrail.close()
+        await super().close()
     
     async def _execute_tool(self, function_name: str, function_args: Dict) -> Any:
         """Execute the appropriate tool function with error handling and guardrail validation"""
         try:
-            logger.info(f"Executing tool: {function_name} with args: {function_args}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Executing tool: %s with args: %s", function_name, function_args)
             
-            # Execute the tool function with proper parameter filtering
-            if function_name == "search_parts":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['query', 'appliance_type']}
-                result = await search_parts(**filtered_args)
-            elif function_name == "search_partselect_web":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['query', 'appliance_type']}
-                result = await search_partselect_web(**filtered_args)
-            elif function_name == "validate_model_number":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['model', 'appliance_type']}
-                result = await validate_model_number(**filtered_args)
-            elif function_name == "get_popular_models":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['appliance_type', 'limit']}
-                result = await get_popular_models(**filtered_args)
-            elif function_name == "get_part_categories":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['appliance_type']}
-                result = await get_part_categories(**filtered_args)
-            elif function_name == "get_brands":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['appliance_type']}
-                result = await get_brands(**filtered_args)
-            elif function_name == "check_compatibility":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['part_number', 'model_number']}
-                result = await check_compatibility(**filtered_args)
-            elif function_name == "get_installation_guide":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['part_number']}
-                result = await get_installation_guide(**filtered_args)
-            elif function_name == "get_troubleshooting_guide":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['issue', 'appliance_type']}
-                result = await get_troubleshooting_guide(**filtered_args)
-            elif function_name == "get_part_details":
-                # Filter to only expected parameters
-                filtered_args = {k: v for k, v in function_args.items() if k in ['part_number']}
-                result = await get_part_details(**filtered_args)
-            else:
+            # Execute the tool function with only the parameters it expects
+            tool, allowed_args = _TOOL_REGISTRY.get(function_name, (None, None))
+            if tool is None:
                 error_msg = f"Unknown function: {function_name}"
                 logger.warning(error_msg)
                 return {"error": error_msg}
+            result = self._call_tool(function_name, tool, {k: v for k, v in function_args.items() if k in allowed_args})
             
             # Track tool usage in context if available
-            if hasattr(self, '_current_context') and self._current_context:
-                self._current_context["tools_used"].append(function_name)
+            turn_context = _TURN_CONTEXT.get()
+            if turn_context:
+                turn_context["tools_used"].append(function_name)
                 
                 # Extract parts from tool results for context
                 if function_name in ["search_parts", "get_part_details"] and result.get("found"):
@@ -366,17 +467,18 @@ class PartsAgent(BaseAgent):
                         parts = result.get("results", [])
                         for part in parts[:5]:  # Limit to 5 parts
                             if part.get("part_number"):
-                                self._current_context["parts_found"].append(part["part_number"])
+                                turn_context["parts_found"].append(part["part_number"])
                     elif function_name == "get_part_details":
                         if result.get("part_number"):
-                            self._current_context["parts_found"].append(result["part_number"])
+                            turn_context["parts_found"].append(result["part_number"])
             
             # Apply guardrail validation to tool results if enabled
             if self.guardrail and result and not result.get("error"):
                 try:
-                    result = await self._validate_tool_result(function_name, function_args, result)
+                    args_json = orjson.dumps(function_args, default=str).decode()  # Serialized once for the guardrail prompt
+                    result = await self._validate_tool_result(function_name, function_args, args_json, result)
                 except Exception as e:
-                    logger.warning(f"Tool result validation failed for {function_name}: {str(e)}")
+                    logger.warning("Tool result validation failed for %s: %s", function_name, e)
                     # Continue with original result if validation fails
             
             return result
@@ -386,162 +488,256 @@ class PartsAgent(BaseAgent):
             logger.error(error_msg)
             return {"error": error_msg}
     
+    def _call_tool(self, function_name: str, tool: Callable[..., Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a tool, serving read-only lookups from its TTL cache (cached results are shared, so never mutate them)"""
+        cache = self.tool_caches.get(function_name)
+        if cache is None:
+            return tool(**kwargs)
+        
+        cache_key = make_cache_key(kwargs)
+        result = cache.get(cache_key)
+        if result is not None:
+            logger.debug("Tool cache HIT: %s", function_name)
+            return result
+        
+        result = tool(**kwargs)
+        if isinstance(result, dict) and not result.get("error"):
+            cache.set(cache_key, result)
+        return result
+    
+    def tool_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters and sizes of the per-tool caches"""
+        return {
+            name: {"hits": cache.hits, "misses": cache.misses, "size": len(cache)}
+            for name, cache in self.tool_caches.items()
+        }
+    
     async def process_message(self, message: str, conversation_id: str) -> Dict[str, Any]:
         """Override to add scope checking and hallucination guardrail"""
+        response, guardrail_context = await self._generate_response(message, conversation_id)
+        
+        if guardrail_context is not None:
+            response = await self._review_response(message, response, guardrail_context)
+        
+        return response
+    
+    async def process_message_with_review(self, message: str, conversation_id: str) -> Tuple[Dict[str, Any], Optional[asyncio.Task]]:
+        """
+        Return the response as soon as it is generated, plus a task running the
+        hallucination guardrail on it (None when the guardrail doesn't apply).
+        
+        The task resolves to the reviewed response so callers can show the answer
+        right away and only send a correction if the guardrail blocks or warns.
+        """
+        response, guardrail_context = await self._generate_response(message, conversation_id)
+        
+        if guardrail_context is None:
+            return response, None
+        
+        review_task = asyncio.create_task(
+            self._review_response(message, dict(response), guardrail_context)
+        )
+        return response, review_task
+    
+    async def stream_events(self, message: str, conversation_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Override to add scope checking; streaming uses the single-agent path (see stream_message_with_review)"""
+        if message and message.strip() and not self._is_in_scope(message):
+            yield {"type": "delta", "content": OUT_OF_SCOPE_MESSAGE}
+            return
+        
+        async for event in super().stream_events(message, conversation_id):
+            yield event
+    
+    async def stream_message_with_review(self, message: str, conversation_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the response events (see BaseAgent.stream_events), then run the hallucination
+        guardrail on the full text while the user is already reading it.
+        
+        Only if the guardrail blocks or warns does a final {"type": "guardrail_correction", ...}
+        event follow, carrying the reviewed response.
+        """
+        review = (self.guardrail is not None and not self.performance_mode and
+                  bool(message and message.strip()) and self._is_in_scope(message))
+        
+        conversation_context = None
+        if review:
+            conversation_context = {
+                "conversation_history": list(self.conversations.get(conversation_id, ())),
+                "tools_used": [],
+                "parts_found": []
+            }
+        token = _TURN_CONTEXT.set(conversation_context)
+        
+        message_parts = []
+        try:
+            async for event in self.stream_events(message, conversation_id):
+                if event["type"] == "delta":
+                    message_parts.append(event["content"])
+                yield event
+        finally:
+            _TURN_CONTEXT.reset(token)
+        
+        if not review:
+            return
+        
+        response = {
+            "message": "".join(message_parts),
+            "timestamp": datetime.now().isoformat(),
+            "agent": self.name
+        }
+        reviewed = await self._review_response(message, response, conversation_context)
+        if reviewed.get("guardrail_blocked") or reviewed.get("guardrail_warning"):
+            yield {"type": "guardrail_correction", **reviewed}
+    
+    async def _generate_response(self, message: str, conversation_id: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Produce the agent response and, if the guardrail should run, the context to evaluate it with"""
+        timestamp = datetime.now().isoformat()  # One clock read per turn, shared by every return path
         try:
             # Validate inputs
             if not message or not message.strip():
                 return {
                     "message": "Message cannot be empty",
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": timestamp,
                     "agent": self.name,
                     "error": True
-                }
+                }, None
             
             # Check if message is in scope
             if not self._is_in_scope(message):
                 return {
-                    "message": "I'm sorry, but I can only help with refrigerator and dishwasher parts. For other appliances like ovens, microwaves, or washing machines, please visit our main website or contact our general support team.",
-                    "timestamp": datetime.now().isoformat(),
+                    "message": OUT_OF_SCOPE_MESSAGE,
+                    "timestamp": timestamp,
                     "agent": self.name,
                     "out_of_scope": True
-                }
+                }, None
             
             # Check for performance mode (bypass enhanced features for speed)
-            performance_mode = os.getenv("PERFORMANCE_MODE", "true").lower() == "true"  # Default to true for best user experience
-            if performance_mode:
-                logger.info("Performance mode enabled - using fast processing")
-                return await super().process_message(message, conversation_id)
+            if self.performance_mode:
+                return await super().process_message(message, conversation_id), None
             
             # Store conversation context for guardrail evaluation
             conversation_context = {
-                "conversation_history": self.conversations.get(conversation_id, []),
+                "conversation_history": list(self.conversations.get(conversation_id, ())),
                 "tools_used": [],
                 "parts_found": []
             }
             
             # Track tool usage during processing
-            self._current_context = conversation_context
-            
-            # Use multi-agent orchestrator for complex queries if available (with timeout)
-            if self.multi_agent_orchestrator:
-                try:
-                    logger.info("Using multi-agent orchestrator for query processing")
-                    # Add timeout to multi-agent processing
-                    import asyncio
-                    final_response = await asyncio.wait_for(
-                        self.multi_agent_orchestrator.process_query(message, conversation_context),
-                        timeout=15.0  # 15 second timeout for multi-agent processing
-                    )
+            token = _TURN_CONTEXT.set(conversation_context)
+            try:
+                # Use multi-agent orchestrator for complex queries if available (with timeout);
+                # single-lookup questions take the faster single-agent path
+                if self.multi_agent_orchestrator and self._needs_multi_agent(message):
+                    try:
+                        logger.info("Using multi-agent orchestrator for query processing")
+                        # Add timeout to multi-agent processing
+                        final_response = await asyncio.wait_for(
+                            self.multi_agent_orchestrator.process_query(message, conversation_context),
+                            timeout=15.0  # 15 second timeout for multi-agent processing
+                        )
                     
-                    # Convert structured response to expected format
-                    response = {
-                        "message": final_response.message,
-                        "timestamp": datetime.now().isoformat(),
-                        "agent": self.name,
-                        "query_type": final_response.response_type.value if final_response.response_type else "general_info",
-                        "appliance_type": final_response.appliance_type.value if final_response.appliance_type else "both",
-                        "confidence_level": final_response.confidence_level.value if final_response.confidence_level else "medium",
-                        "partselect_links": final_response.partselect_links or [],
-                        "recommended_actions": final_response.recommended_actions or [],
-                        "key_information": final_response.key_information or {},
-                        "multi_agent_used": True,
-                        "disclaimer": final_response.disclaimer
-                    }
+                        # Convert structured response to expected format
+                        response = {
+                            "message": final_response.message,
+                            "timestamp": timestamp,
+                            "agent": self.name,
+                            "query_type": final_response.response_type.value if final_response.response_type else "general_info",
+                            "appliance_type": final_response.appliance_type.value if final_response.appliance_type else "both",
+                            "confidence_level": final_response.confidence_level.value if final_response.confidence_level else "medium",
+                            "partselect_links": final_response.partselect_links or [],
+                            "recommended_actions": final_response.recommended_actions or [],
+                            "key_information": final_response.key_information or {},
+                            "multi_agent_used": True,
+                            "disclaimer": final_response.disclaimer
+                        }
                     
-                    # Add to conversation history
-                    self.conversations[conversation_id].append({
-                        "role": "assistant",
-                        "content": response["message"]
-                    })
+                        # Add to conversation history
+                        history = await self.conversations.load(conversation_id)
+                        history.append({
+                            "role": "assistant",
+                            "content": response["message"]
+                        })
                     
-                except (Exception, asyncio.TimeoutError) as e:
-                    logger.warning(f"Multi-agent orchestrator failed: {str(e)}. Falling back to standard processing.")
-                    # Fall back to standard processing
+                    except (Exception, asyncio.TimeoutError) as e:
+                        logger.warning("Multi-agent orchestrator failed: %s. Falling back to standard processing.", e)
+                        # Fall back to standard processing
+                        response = await super().process_message(message, conversation_id)
+                else:
+                    # Process normally if in scope (standard single-agent mode)
                     response = await super().process_message(message, conversation_id)
-            else:
-                # Process normally if in scope (standard single-agent mode)
-                response = await super().process_message(message, conversation_id)
+            finally:
+                _TURN_CONTEXT.reset(token)
+            
             
-            # Apply hallucination guardrail if enabled and response is successful
+            # Apply hallucination guardrail only if enabled and response is successful
             if (self.guardrail and 
                 not response.get("error", False) and 
                 not response.get("out_of_scope", False)):
-                
-                try:
-                    # Collect additional context from the response
-                    self._update_context_from_response(conversation_context, response)
-                    
-                    # Evaluate response for hallucinations with timeout
-                    import asyncio
-                    guardrail_result = await asyncio.wait_for(
-                        self.guardrail.evaluate_response(
-                            user_query=message,
-                            assistant_response=response["message"],
-                            context=conversation_context
-                        ),
-                        timeout=8.0  # 8 second timeout for guardrail evaluation
-                    )
-                    
-                    # Apply guardrail action
-                    response = self._apply_guardrail_action(response, guardrail_result, message)
-                    
-                    # Log guardrail results for monitoring
-                    self._log_guardrail_result(message, response["message"], guardrail_result)
-                    
-                except (Exception, asyncio.TimeoutError) as e:
-                    logger.warning(f"Guardrail evaluation failed: {str(e)}. Proceeding without guardrail.")
+                return response, conversation_context
             
-            # Clear context tracking
-            self._current_context = None
-            
-            return response
+            return response, None
             
         except Exception as e:
             error_msg = f"Error processing message: {str(e)}"
-            logger.error(f"[{self.name}] {error_msg}")
+            logger.error("[%s] %s", self.name, error_msg)
             return {
                 "message": error_msg,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "agent": self.name,
                 "error": True
-            }
+            }, None
+    
+    async def _review_response(self, message: str, response: Dict[str, Any], conversation_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the hallucination guardrail on a response and apply its action"""
+        try:
+            # Collect additional context from the response
+            self._update_context_from_response(conversation_context, response)
+            
+            # Evaluate response for hallucinations with timeout
+            guardrail_result = await asyncio.wait_for(
+                self.guardrail.evaluate_response(
+                    user_query=message,
+                    assistant_response=response["message"],
+                    context=conversation_context
+                ),
+                timeout=8.0  # 8 second timeout for guardrail evaluation
+            )
+            
+            # Apply guardrail action
+            response = self._apply_guardrail_action(response, guardrail_result, message)
+            
+            # Log guardrail results for monitoring
+            self._log_guardrail_result(message, response["message"], guardrail_result)
+            
+        except (Exception, asyncio.TimeoutError) as e:
+            logger.warning("Guardrail evaluation failed: %s. Proceeding without guardrail.", e)
+        
+        return response
     
     def _is_in_scope(self, message: str) -> bool:
         """Enhanced scope checking with better keyword matching"""
         if not message:
             return True  # Let the base agent handle empty messages
             
-        # Keywords that indicate the query is IN SCOPE (positive indicators)
-        in_scope_keywords = [
-            "refrigerator", "fridge", "dishwasher", "dish washer", 
-            "ice maker", "freezer", "cooling", "chiller"
-        ]
-        
-        # Keywords that indicate the query is OUT OF SCOPE (negative indicators)
-        out_of_scope_keywords = [
-            "oven", "stove", "range", "microwave", "washer", "washing machine", 
-            "dryer", "air conditioner", "ac", "heater", "furnace", "vacuum", 
-            "blender", "toaster", "coffee maker", "grill", "cooktop"
-        ]
-        
-        message_lower = message.lower().strip()
-        
         # If it explicitly mentions in-scope appliances, allow it
-        for keyword in in_scope_keywords:
-            if keyword in message_lower:
-                return True
+        if _IN_SCOPE_RE.search(message):
+            return True
         
         # Check for out-of-scope appliances
-        for keyword in out_of_scope_keywords:
-            if keyword in message_lower:
-                return False
+        if _OUT_OF_SCOPE_RE.search(message):
+            return False
         
         # If no clear indicators, assume it might be related to our domain
         # This prevents false negatives for general parts questions
         return True
     
-    async def _validate_tool_result(self, function_name: str, function_args: Dict, result: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _needs_multi_agent(message: str) -> bool:
+        """Cheap gate for the orchestrator: several distinct part/model numbers, or comparative/conjunctive wording"""
+        identifiers = {match.group(0).upper() for match in _IDENTIFIER_RE.finditer(message)}
+        return len(identifiers) >= 2 or _MULTI_STEP_CUE_RE.search(message) is not None
+    
+    async def _validate_tool_result(self, function_name: str, function_args: Dict, args_json: str, result: Dict[str, Any]) -> Dict[str, Any]:
         """Validate tool results for potential hallucinations or inconsistencies"""
         try:
             # Create a summary of the tool result for evaluation
@@ -549,75 +745,91 @@ class PartsAgent(BaseAgent):
             
             # Quick evaluation focused on tool data quality
             tool_evaluation = await self.guardrail.evaluate_response(
-                user_query=f"Tool: {function_name} with args: {function_args}",
+                user_query=f"Tool: {function_name} with args: {args_json}",
                 assistant_response=result_summary,
                 context={
                     "tool_name": function_name,
                     "tool_args": function_args,
                     "is_tool_result": True
-                }
+                },
+                urgent=False  # Queued for the offline audit when one is configured
             )
             
             # If tool result seems problematic, sanitize it
             if tool_evaluation.confidence_score > 0.8 and tool_evaluation.is_hallucination:
-                logger.warning(f"Tool result flagged as potentially hallucinated: {function_name}")
+                logger.warning("Tool result flagged as potentially hallucinated: %s", function_name)
                 
-                # Add warning to result
+                # Add warning to a copy of the result (it may be shared through the tool cache)
                 if isinstance(result, dict):
-                    result["guardrail_warning"] = "Tool result may contain inaccurate information"
-                    result["guardrail_confidence"] = tool_evaluation.confidence_score
+                    result = {
+                        **result,
+                        "guardrail_warning": "Tool result may contain inaccurate information",
+                        "guardrail_confidence": tool_evaluation.confidence_score
+                    }
             
             return result
             
         except Exception as e:
-            logger.warning(f"Tool result validation failed: {str(e)}")
+            logger.warning("Tool result validation failed: %s", e)
             return result
 
     def _summarize_tool_result(self, function_name: str, function_args: Dict, result: Dict[str, Any]) -> str:
-        """Create a summary of tool result for guardrail evaluation"""
+        """Create a summary of tool result for guardrail evaluation (memoized per result object)"""
+        key = (function_name, id(result))
+        cached = self._summary_cache.get(key)
+        if cached is not None and cached[0] is result:  # Identity check guards against id reuse
+            self._summary_cache.move_to_end(key)
+            return cached[1]
+        
+        summary = self._build_tool_summary(function_name, result)
+        self._summary_cache[key] = (result, summary)
+        if len(self._summary_cache) > 256:
+            self._summary_cache.popitem(last=False)
+        return summary
+    
+    @staticmethod
+    def _build_tool_summary(function_name: str, result: Dict[str, Any]) -> str:
         try:
-            if function_name == "search_parts":
-                if result.get("found"):
-                    parts = result.get("results", [])
-                    return f"Found {len(parts)} parts: " + ", ".join([
-                        f"{p.get('part_number', 'Unknown')} ({p.get('name', 'Unknown')}) - ${p.get('price', 'Unknown')}"
-                        for p in parts[:3]
-                    ])
-                else:
+            match function_name:
+                case "search_parts":
+                    if result.get("found"):
+                        parts = result.get("results", [])
+                        return f"Found {len(parts)} parts: " + ", ".join(
+                            f"{part_get('part_number', 'Unknown')} ({part_get('name', 'Unknown')}) - ${part_get('price', 'Unknown')}"
+                            for part_get in (part.get for part in parts[:3])
+                        )
                     return "No parts found for search query"
-            
-            elif function_name == "check_compatibility":
-                compatible = result.get("compatible", False)
-                part_num = result.get("part_number", "Unknown")
-                model_num = result.get("model_number", "Unknown")
-                return f"Part {part_num} is {'compatible' if compatible else 'not compatible'} with model {model_num}"
-            
-            elif function_name == "get_installation_guide":
-                if result.get("found"):
-                    steps = result.get("steps", [])
-                    time_est = result.get("time_estimate", "Unknown")
-                    return f"Installation guide for {result.get('part_name', 'part')} - {len(steps)} steps, estimated time: {time_est}"
-                else:
+                
+                case "check_compatibility":
+                    compatible = result.get("compatible", False)
+                    part_num = result.get("part_number", "Unknown")
+                    model_num = result.get("model_number", "Unknown")
+                    return f"Part {part_num} is {'compatible' if compatible else 'not compatible'} with model {model_num}"
+                
+                case "get_installation_guide":
+                    if result.get("found"):
+                        steps = result.get("steps", [])
+                        time_est = result.get("time_estimate", "Unknown")
+                        return f"Installation guide for {result.get('part_name', 'part')} - {len(steps)} steps, estimated time: {time_est}"
                     return "No installation guide found"
-            
-            elif function_name == "get_troubleshooting_guide":
-                if result.get("found"):
-                    causes = result.get("possible_causes", [])
-                    solutions = result.get("solutions", [])
-                    return f"Troubleshooting for {result.get('issue', 'unknown issue')} - {len(causes)} possible causes, {len(solutions)} solutions"
-                else:
+                
+                case "get_troubleshooting_guide":
+                    if result.get("found"):
+                        causes = result.get("possible_causes", [])
+                        solutions = result.get("solutions", [])
+                        return f"Troubleshooting for {result.get('issue', 'unknown issue')} - {len(causes)} possible causes, {len(solutions)} solutions"
                     return f"No troubleshooting guide found for {result.get('issue', 'unknown issue')}"
-            
-            elif function_name == "get_part_details":
-                if result.get("found"):
-                    return f"Part details for {result.get('part_number', 'Unknown')}: {result.get('name', 'Unknown')} - ${result.get('price', 'Unknown')}"
-                else:
+                
+                case "get_part_details":
+                    if result.get("found"):
+                        return f"Part details for {result.get('part_number', 'Unknown')}: {result.get('name', 'Unknown')} - ${result.get('price', 'Unknown')}"
                     return f"No details found for part {result.get('part_number', 'Unknown')}"
-            
-            return str(result)[:200]  # Fallback to truncated string representation
+                
+                case _:
+                    return orjson.dumps(result, default=str, option=orjson.OPT_SORT_KEYS)[:200].decode(errors="ignore")  # Fallback to truncated JSON
             
         except Exception as e:
-            logger.warning(f"Failed to summarize tool result: {str(e)}")
+            logger.warning("Failed to summarize tool result: %s", e)
             return str(result)[:100]
 
     def _update_context_from_response(self, context: Dict[str, Any], response: Dict[str, Any]) -> None:
@@ -625,14 +837,16 @@ class PartsAgent(BaseAgent):
         try:
             response_message = response.get("message", "")
             
-            # Extract part numbers mentioned in response (simple pattern matching)
-            import re
-            part_numbers = re.findall(r'\b[A-Z0-9]{6,12}\b', response_message)
-            if part_numbers:
-                context["parts_found"] = part_numbers[:5]  # Limit to first 5
+            # Extract part numbers mentioned in response (simple pattern matching).
+            # When tools ran, keep the parts they returned so the guardrail can tell
+            # tool-backed part numbers from ones that only appear in the response
+            if not context.get("tools_used"):
+                part_numbers = [match.group(0) for match in islice(_PART_NUMBER_RE.finditer(response_message), 5)]
+                if part_numbers:
+                    context["parts_found"] = part_numbers  # Limit to first 5
                 
         except Exception as e:
-            logger.warning(f"Failed to update context from response: {str(e)}")
+            logger.warning("Failed to update context from response: %s", e)
 
     def _apply_guardrail_action(self, response: Dict[str, Any], guardrail_result, original_query: str) -> Dict[str, Any]:
         """Apply the appropriate action based on guardrail evaluation"""
@@ -641,26 +855,42 @@ class PartsAgent(BaseAgent):
             # Replace response with safe fallback
             fallback_message = self.guardrail.get_fallback_response(original_query, guardrail_result)
             
-            response["message"] = fallback_message
-            response["guardrail_blocked"] = True
-            response["guardrail_reasons"] = guardrail_result.reasons
+            response.update({
+                "message": fallback_message,
+                "guardrail_blocked": True,
+                "guardrail_reasons": guardrail_result.reasons
+            })
             
         elif self.guardrail.should_warn_user(guardrail_result):
             # Append warning to existing response
             warning = self.guardrail.get_warning_message(guardrail_result)
-            response["message"] += warning
-            response["guardrail_warning"] = True
-            response["guardrail_reasons"] = guardrail_result.reasons
+            response.update({
+                "message": response["message"] + warning,
+                "guardrail_warning": True,
+                "guardrail_reasons": guardrail_result.reasons
+            })
         
         # Always add guardrail metadata for logging/debugging
-        response["guardrail_evaluated"] = True
-        response["guardrail_confidence"] = guardrail_result.confidence_score
-        response["guardrail_action"] = guardrail_result.action.value
+        response.update({
+            "guardrail_evaluated": True,
+            "guardrail_confidence": guardrail_result.confidence_score,
+            "guardrail_action": guardrail_result.action.value
+        })
         
         return response
 
     def _log_guardrail_result(self, query: str, response: str, result) -> None:
         """Log guardrail evaluation results for monitoring"""
+        if result.action == _ACTION_BLOCK:
+            level, summary = logging.WARNING, "Guardrail BLOCKED response: %s"
+        elif result.action == _ACTION_WARN:
+            level, summary = logging.INFO, "Guardrail WARNED on response: %s"
+        else:
+            level, summary = logging.DEBUG, "Guardrail evaluated response: %s"
+        
+        # Skip building and serializing the record when it wouldn't be emitted
+        if not logger.isEnabledFor(level):
+            return
         
         log_data = {
             "query_preview": query[:100] + "..." if len(query) > 100 else query,
@@ -671,14 +901,13 @@ class PartsAgent(BaseAgent):
             "reasons": result.reasons[:3],  # Limit for brevity
             "severity": result.details.get("severity", "unknown")
         }
-        
-        if result.action == GuardrailAction.BLOCK:
-            logger.warning(f"Guardrail BLOCKED response: {json.dumps(log_data)}")
-        elif result.action == GuardrailAction.WARN:
-            logger.info(f"Guardrail WARNED on response: {json.dumps(log_data)}")
-        else:
-            logger.debug(f"Guardrail evaluated response: {json.dumps(log_data)}")
+        logger.log(level, summary, orjson.dumps(log_data, default=str).decode())
 
     # Add missing helper method
     def _get_timestamp(self) -> str:
-        return datetime.now().isoformat()
\ No newline at end of file
+        return datetime.now().isoformat()
+
+@lru_cache(maxsize=1)
+def get_parts_agent() -> PartsAgent:
+    """Return the process-wide PartsAgent, creating it on first use"""
+    return PartsAgent()
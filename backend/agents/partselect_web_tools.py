@@ -1,13 +1,13 @@
 """
 PartSelect Web Tools - Web search and URL construction for PartSelect.com
+The tools are in-memory lookups over the known PartSelect catalogue, so they are plain synchronous functions
 """
 
-import asyncio
 import logging
-from typing import Dict, Any, List, Optional
-import requests
+from typing import Dict, Any, List, Optional, Tuple
 from urllib.parse import quote
 import re
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -65,108 +65,176 @@ APPLIANCE_BRANDS = [
     "Thermador", "Uni", "Whirlpool", "White-Westinghouse"
 ]
 
-async def search_partselect_web(query: str, appliance_type: str = "both") -> Dict[str, Any]:
+# Lookup structures built once at import: O(1) model membership, and lowercased keyword -> canonical
+# name so the per-query scans don't re-lower every constant (insertion order keeps first-match semantics)
+_DISHWASHER_MODEL_SET = frozenset(POPULAR_DISHWASHER_MODELS)
+_REFRIGERATOR_MODEL_SET = frozenset(POPULAR_REFRIGERATOR_MODELS)
+_DISHWASHER_PARTS_LC = {part.lower(): part for part in DISHWASHER_PARTS}
+_REFRIGERATOR_PARTS_LC = {part.lower(): part for part in REFRIGERATOR_PARTS}
+_BRANDS_LC = {brand.lower(): brand for brand in APPLIANCE_BRANDS}
+
+# URL fragments precomputed for the known part categories and appliance types
+_PART_SLUGS = {part: part.replace(' ', '-') for part in DISHWASHER_PARTS + REFRIGERATOR_PARTS}
+_APPLIANCE_TYPE_TITLE = {"dishwasher": "Dishwasher", "refrigerator": "Refrigerator"}
+
+def _part_slug(part: str) -> str:
+    return _PART_SLUGS.get(part) or part.replace(' ', '-')
+
+def _appliance_title(appliance_type: str) -> str:
+    return _APPLIANCE_TYPE_TITLE.get(appliance_type) or appliance_type.title()
+
+# Query words; single-word keywords are matched against this token set, the rest by substring
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Keyword index over one or more categories, scanned in a single pass: single-word keyword -> its
+# list position in each category (None where absent), the same for multi-word keywords as
+# (keyword, positions) pairs, and each category's (lowercased, canonical) pairs in list order
+_KeywordIndex = Tuple[
+    Dict[str, Tuple[Optional[int], ...]],
+    Tuple[Tuple[str, Tuple[Optional[int], ...]], ...],
+    Tuple[Tuple[Tuple[str, str], ...], ...]
+]
+
+def _build_keyword_index(*categories: Dict[str, str]) -> _KeywordIndex:
+    positions: Dict[str, List[Optional[int]]] = {}
+    for c, keywords in enumerate(categories):
+        for i, kw_lower in enumerate(keywords):
+            positions.setdefault(kw_lower, [None] * len(categories))[c] = i
+    single = {kw_lower: tuple(p) for kw_lower, p in positions.items() if _WORD_RE.fullmatch(kw_lower)}
+    multi = tuple((kw_lower, tuple(p)) for kw_lower, p in positions.items() if kw_lower not in single)
+    return single, multi, tuple(tuple(keywords.items()) for keywords in categories)
+
+# Dishwasher and refrigerator parts share most keywords, so they are indexed (and scanned) together
+_PARTS_INDEX = _build_keyword_index(_DISHWASHER_PARTS_LC, _REFRIGERATOR_PARTS_LC)
+_BRANDS_INDEX = _build_keyword_index(_BRANDS_LC)
+
+def _first_keywords(query_lower: str, tokens: frozenset, index: _KeywordIndex) -> List[Optional[Tuple[str, str]]]:
+    """Return, per category, the first (lowercased, canonical) keyword pair in list order found in the query"""
+    single, multi, pairs = index
+    hits = [single[token] for token in tokens & single.keys()]
+    hits.extend(p for kw_lower, p in multi if kw_lower in query_lower)
+    first: List[Optional[int]] = [None] * len(pairs)
+    for p in hits:
+        for c, i in enumerate(p):
+            if i is not None and (first[c] is None or i < first[c]):
+                first[c] = i
+    return [None if i is None else pairs[c][i] for c, i in enumerate(first)]
+
+# Fields of a web search result; the cached core stores results as tuples in this order
+_RESULT_FIELDS = ("title", "url", "snippet", "type")
+
+@lru_cache(maxsize=1024)
+def _search_core(query: str, appliance_type: str) -> Tuple[Tuple[str, str, str, str], ...]:
+    """Deterministic part of search_partselect_web: result tuples for a (query, appliance_type) pair"""
+    # Note: In a real implementation, you'd use a web search API
+    # For now, we'll simulate with URL construction and known data.
+    # This is string/dict work, which JIT compilers like Numba can't speed up. A real fetch would be
+    # I/O-bound: make it async over the shared pooled client (llm_client.get_http_client), keep this
+    # offline lookup as the fallback, and cache per query outside this lru_cache.
+    
+    results = []
+    
+    # Check if query matches known models
+    query_upper = query.upper()
+    if query_upper in _DISHWASHER_MODEL_SET:
+        results.append((
+            f"Parts for {query_upper} Dishwasher",
+            f"{PARTSELECT_BASE_URL}/Models/{query_upper}/",
+            f"Find replacement parts for your {query_upper} dishwasher model",
+            "model_page"
+        ))
+    
+    if query_upper in _REFRIGERATOR_MODEL_SET:
+        results.append((
+            f"Parts for {query_upper} Refrigerator",
+            f"{PARTSELECT_BASE_URL}/Models/{query_upper}/",
+            f"Find replacement parts for your {query_upper} refrigerator model",
+            "model_page"
+        ))
+    
+    # Check for part type and brand matches; each category contributes its first keyword
+    # (in list order) found in the query, and nothing is scanned if appliance_type excludes both.
+    # Single-word keywords must match a whole query word (so "GE" doesn't fire on "change")
+    query_lower = query.lower()
+    tokens = frozenset(_WORD_RE.findall(query_lower))
+    wants_dishwasher = appliance_type in ["dishwasher", "both"]
+    wants_refrigerator = appliance_type in ["refrigerator", "both"]
+    dishwasher_part = refrigerator_part = brand_match = None
+    if wants_dishwasher or wants_refrigerator:
+        dishwasher_part, refrigerator_part = _first_keywords(query_lower, tokens, _PARTS_INDEX)
+        brand_match = _first_keywords(query_lower, tokens, _BRANDS_INDEX)[0]
+    
+    if wants_dishwasher and dishwasher_part:
+        part_lower, part = dishwasher_part
+        results.append((
+            f"Dishwasher {part}",
+            f"{PARTSELECT_BASE_URL}/Dishwasher-{_PART_SLUGS[part]}.htm",
+            f"Shop for dishwasher {part_lower} parts",
+            "part_category"
+        ))
+    
+    if wants_refrigerator and refrigerator_part:
+        part_lower, part = refrigerator_part
+        results.append((
+            f"Refrigerator {part}",
+            f"{PARTSELECT_BASE_URL}/Refrigerator-{_PART_SLUGS[part]}.htm",
+            f"Shop for refrigerator {part_lower} parts",
+            "part_category"
+        ))
+    
+    if brand_match:
+        brand = brand_match[1]
+        if wants_dishwasher:
+            results.append((
+                f"{brand} Dishwasher Parts",
+                f"{PARTSELECT_BASE_URL}/{brand}-Dishwasher-Parts.htm",
+                f"Find {brand} dishwasher replacement parts",
+                "brand_page"
+            ))
+        if wants_refrigerator:
+            results.append((
+                f"{brand} Refrigerator Parts",
+                f"{PARTSELECT_BASE_URL}/{brand}-Refrigerator-Parts.htm",
+                f"Find {brand} refrigerator replacement parts",
+                "brand_page"
+            ))
+    
+    # Add main category pages if no specific matches
+    if not results:
+        if wants_dishwasher:
+            results.append((
+                "Dishwasher Parts",
+                f"{PARTSELECT_BASE_URL}/Dishwasher-Parts.htm",
+                "Browse all dishwasher parts and accessories",
+                "main_category"
+            ))
+        
+        if wants_refrigerator:
+            results.append((
+                "Refrigerator Parts",
+                f"{PARTSELECT_BASE_URL}/Refrigerator-Parts.htm",
+                "Browse all refrigerator parts and accessories",
+                "main_category"
+            ))
+    
+    return tuple(results)
+
+def search_partselect_web(query: str, appliance_type: str = "both") -> Dict[str, Any]:
     """
     Search PartSelect website using web search
     """
     try:
-        # Construct targeted search for PartSelect
-        search_terms = f"site:partselect.com {query}"
-        if appliance_type in ["refrigerator", "dishwasher"]:
-            search_terms += f" {appliance_type}"
-        
-        # Note: In a real implementation, you'd use a web search API
-        # For now, we'll simulate with URL construction and known data
-        
-        results = []
-        
-        # Check if query matches known models
-        query_upper = query.upper()
-        if query_upper in POPULAR_DISHWASHER_MODELS:
-            results.append({
-                "title": f"Parts for {query_upper} Dishwasher",
-                "url": f"{PARTSELECT_BASE_URL}/Models/{query_upper}/",
-                "snippet": f"Find replacement parts for your {query_upper} dishwasher model",
-                "type": "model_page"
-            })
-        
-        if query_upper in POPULAR_REFRIGERATOR_MODELS:
-            results.append({
-                "title": f"Parts for {query_upper} Refrigerator", 
-                "url": f"{PARTSELECT_BASE_URL}/Models/{query_upper}/",
-                "snippet": f"Find replacement parts for your {query_upper} refrigerator model",
-                "type": "model_page"
-            })
-        
-        # Check for part type matches
-        query_lower = query.lower()
-        for part in DISHWASHER_PARTS:
-            if part.lower() in query_lower and appliance_type in ["dishwasher", "both"]:
-                results.append({
-                    "title": f"Dishwasher {part}",
-                    "url": f"{PARTSELECT_BASE_URL}/Dishwasher-{part.replace(' ', '-')}.htm",
-                    "snippet": f"Shop for dishwasher {part.lower()} parts",
-                    "type": "part_category"
-                })
-                break
-        
-        for part in REFRIGERATOR_PARTS:
-            if part.lower() in query_lower and appliance_type in ["refrigerator", "both"]:
-                results.append({
-                    "title": f"Refrigerator {part}",
-                    "url": f"{PARTSELECT_BASE_URL}/Refrigerator-{part.replace(' ', '-')}.htm", 
-                    "snippet": f"Shop for refrigerator {part.lower()} parts",
-                    "type": "part_category"
-                })
-                break
-        
-        # Check for brand matches
-        for brand in APPLIANCE_BRANDS:
-            if brand.lower() in query_lower:
-                if appliance_type in ["dishwasher", "both"]:
-                    results.append({
-                        "title": f"{brand} Dishwasher Parts",
-                        "url": f"{PARTSELECT_BASE_URL}/{brand}-Dishwasher-Parts.htm",
-                        "snippet": f"Find {brand} dishwasher replacement parts",
-                        "type": "brand_page"
-                    })
-                if appliance_type in ["refrigerator", "both"]:
-                    results.append({
-                        "title": f"{brand} Refrigerator Parts", 
-                        "url": f"{PARTSELECT_BASE_URL}/{brand}-Refrigerator-Parts.htm",
-                        "snippet": f"Find {brand} refrigerator replacement parts",
-                        "type": "brand_page"
-                    })
-                break
-        
-        # Add main category pages if no specific matches
-        if not results:
-            if appliance_type in ["dishwasher", "both"]:
-                results.append({
-                    "title": "Dishwasher Parts",
-                    "url": f"{PARTSELECT_BASE_URL}/Dishwasher-Parts.htm",
-                    "snippet": "Browse all dishwasher parts and accessories",
-                    "type": "main_category"
-                })
-            
-            if appliance_type in ["refrigerator", "both"]:
-                results.append({
-                    "title": "Refrigerator Parts",
-                    "url": f"{PARTSELECT_BASE_URL}/Refrigerator-Parts.htm", 
-                    "snippet": "Browse all refrigerator parts and accessories",
-                    "type": "main_category"
-                })
-        
+        results = _search_core(query, appliance_type)
         return {
             "found": len(results) > 0,
             "count": len(results),
-            "results": results[:5],  # Limit to 5 results
+            "results": [dict(zip(_RESULT_FIELDS, result)) for result in results[:5]],  # Limit to 5 results
             "search_query": query,
             "appliance_type": appliance_type
         }
         
     except Exception as e:
-        logger.error(f"Error searching PartSelect web: {str(e)}")
+        logger.error("Error searching PartSelect web: %s", e)
         return {
             "found": False,
             "count": 0,
@@ -174,7 +242,7 @@ async def search_partselect_web(query: str, appliance_type: str = "both") -> Dic
             "error": "Web search service unavailable"
         }
 
-async def get_partselect_url(item_type: str, item_name: str, appliance_type: str = None) -> Dict[str, Any]:
+def get_partselect_url(item_type: str, item_name: str, appliance_type: str = None) -> Dict[str, Any]:
     """
     Construct PartSelect URLs for specific items
     """
@@ -196,21 +264,21 @@ async def get_partselect_url(item_type: str, item_name: str, appliance_type: str
         elif item_type == "part":
             # Part category URL
             if appliance_type:
-                part_formatted = item_name.replace(' ', '-')
-                url = f"{base_url}/{appliance_type.title()}-{part_formatted}.htm"
+                appliance_title = _appliance_title(appliance_type)
+                url = f"{base_url}/{appliance_title}-{_part_slug(item_name)}.htm"
                 return {
                     "found": True,
                     "url": url,
                     "type": "part_category",
                     "name": item_name,
                     "appliance_type": appliance_type,
-                    "description": f"{appliance_type.title()} {item_name} parts"
+                    "description": f"{appliance_title} {item_name} parts"
                 }
         
         elif item_type == "brand":
             # Brand page URL
             if appliance_type:
-                url = f"{base_url}/{item_name}-{appliance_type.title()}-Parts.htm"
+                url = f"{base_url}/{item_name}-{_appliance_title(appliance_type)}-Parts.htm"
                 return {
                     "found": True,
                     "url": url,
@@ -223,7 +291,7 @@ async def get_partselect_url(item_type: str, item_name: str, appliance_type: str
         elif item_type == "main":
             # Main category page
             if appliance_type:
-                url = f"{base_url}/{appliance_type.title()}-Parts.htm"
+                url = f"{base_url}/{_appliance_title(appliance_type)}-Parts.htm"
                 return {
                     "found": True,
                     "url": url,
@@ -238,167 +306,193 @@ async def get_partselect_url(item_type: str, item_name: str, appliance_type: str
         }
         
     except Exception as e:
-        logger.error(f"Error constructing PartSelect URL: {str(e)}")
+        logger.error("Error constructing PartSelect URL: %s", e)
         return {
             "found": False,
             "error": f"URL construction failed: {str(e)}"
         }
 
-async def validate_model_number(model: str, appliance_type: str = None) -> Dict[str, Any]:
+@lru_cache(maxsize=1024)
+def _validate_core(model_upper: str) -> Optional[Tuple[Optional[str], str]]:
+    """(appliance type, confidence) for a known or well-formed model number, None if invalid"""
+    # Check against known popular models
+    if model_upper in _DISHWASHER_MODEL_SET:
+        return "dishwasher", "high"
+    if model_upper in _REFRIGERATOR_MODEL_SET:
+        return "refrigerator", "high"
+    
+    # Basic format validation for appliance model numbers
+    # Most appliance models are 6-15 alphanumeric characters (ASCII, so [A-Z0-9] once uppercased)
+    if 6 <= len(model_upper) <= 15 and model_upper.isascii() and model_upper.isalnum():
+        return None, "medium"
+    
+    return None
+
+def validate_model_number(model: str, appliance_type: str = None) -> Dict[str, Any]:
     """
     Validate if a model number exists in PartSelect
     """
     try:
         model_upper = model.upper().strip()
+        validation = _validate_core(model_upper)
         
-        # Check against known popular models
-        if model_upper in POPULAR_DISHWASHER_MODELS:
-            return {
-                "valid": True,
-                "model": model_upper,
-                "appliance_type": "dishwasher",
-                "url": f"{PARTSELECT_BASE_URL}/Models/{model_upper}/",
-                "confidence": "high"
-            }
-        
-        if model_upper in POPULAR_REFRIGERATOR_MODELS:
+        if validation is None:
             return {
-                "valid": True,
-                "model": model_upper,
-                "appliance_type": "refrigerator", 
-                "url": f"{PARTSELECT_BASE_URL}/Models/{model_upper}/",
-                "confidence": "high"
-            }
-        
-        # Basic format validation for appliance model numbers
-        # Most appliance models are 6-15 alphanumeric characters
-        if re.match(r'^[A-Z0-9]{6,15}$', model_upper):
-            return {
-                "valid": True,
-                "model": model_upper,
-                "appliance_type": appliance_type or "unknown",
-                "url": f"{PARTSELECT_BASE_URL}/Models/{model_upper}/",
-                "confidence": "medium",
-                "note": "Model format appears valid but not in popular models list"
+                "valid": False,
+                "model": model,
+                "reason": "Invalid model number format"
             }
         
-        return {
-            "valid": False,
-            "model": model,
-            "reason": "Invalid model number format"
+        known_type, confidence = validation
+        response = {
+            "valid": True,
+            "model": model_upper,
+            "appliance_type": known_type or appliance_type or "unknown",
+            "url": f"{PARTSELECT_BASE_URL}/Models/{model_upper}/",
+            "confidence": confidence
         }
+        if known_type is None:
+            response["note"] = "Model format appears valid but not in popular models list"
+        return response
         
     except Exception as e:
-        logger.error(f"Error validating model: {str(e)}")
+        logger.error("Error validating model: %s", e)
         return {
             "valid": False,
             "model": model,
             "error": str(e)
         }
 
-async def get_popular_models(appliance_type: str, limit: int = 10) -> Dict[str, Any]:
+@lru_cache(maxsize=64)
+def _popular_models_core(appliance_type: str, limit: int) -> Optional[Tuple[Dict[str, Any], ...]]:
+    """Model entries for a (appliance_type, limit) pair, or None for an unknown appliance type (entries are shared, don't mutate them)"""
+    if appliance_type.lower() == "dishwasher":
+        models = POPULAR_DISHWASHER_MODELS[:limit]
+    elif appliance_type.lower() == "refrigerator":
+        models = POPULAR_REFRIGERATOR_MODELS[:limit]
+    else:
+        return None
+    
+    return tuple(
+        {
+            "model": model,
+            "appliance_type": appliance_type,
+            "url": f"{PARTSELECT_BASE_URL}/Models/{model}/",
+            "parts_url": f"{PARTSELECT_BASE_URL}/Models/{model}/"
+        }
+        for model in models
+    )
+
+def get_popular_models(appliance_type: str, limit: int = 10) -> Dict[str, Any]:
     """
     Get popular models for specific appliance type
     """
     try:
-        if appliance_type.lower() == "dishwasher":
-            models = POPULAR_DISHWASHER_MODELS[:limit]
-        elif appliance_type.lower() == "refrigerator":
-            models = POPULAR_REFRIGERATOR_MODELS[:limit]
-        else:
+        model_data = _popular_models_core(appliance_type, limit)
+        if model_data is None:
             return {
                 "found": False,
                 "error": "Invalid appliance type. Use 'dishwasher' or 'refrigerator'"
             }
         
-        model_data = []
-        for model in models:
-            model_data.append({
-                "model": model,
-                "appliance_type": appliance_type,
-                "url": f"{PARTSELECT_BASE_URL}/Models/{model}/",
-                "parts_url": f"{PARTSELECT_BASE_URL}/Models/{model}/"
-            })
-        
         return {
             "found": True,
             "appliance_type": appliance_type,
             "count": len(model_data),
-            "models": model_data
+            "models": list(model_data)
         }
         
     except Exception as e:
-        logger.error(f"Error getting popular models: {str(e)}")
+        logger.error("Error getting popular models: %s", e)
         return {
             "found": False,
             "error": str(e)
         }
 
-async def get_part_categories(appliance_type: str) -> Dict[str, Any]:
+def _build_part_categories(appliance_type: str) -> Dict[str, Any]:
+    if appliance_type.lower() == "dishwasher":
+        parts = DISHWASHER_PARTS
+    elif appliance_type.lower() == "refrigerator":
+        parts = REFRIGERATOR_PARTS
+    else:
+        return {
+            "found": False,
+            "error": "Invalid appliance type. Use 'dishwasher' or 'refrigerator'"
+        }
+    
+    appliance_title = _APPLIANCE_TYPE_TITLE[appliance_type.lower()]
+    categories = []
+    for part in parts:
+        categories.append({
+            "name": part,
+            "url": f"{PARTSELECT_BASE_URL}/{appliance_title}-{_PART_SLUGS[part]}.htm",
+            "appliance_type": appliance_type
+        })
+    
+    return {
+        "found": True,
+        "appliance_type": appliance_type,
+        "count": len(categories),
+        "categories": categories
+    }
+
+def _build_brands(appliance_type: Optional[str]) -> Dict[str, Any]:
+    appliance_title = _appliance_title(appliance_type) if appliance_type else None
+    brands_data = []
+    for brand in APPLIANCE_BRANDS:
+        brand_info = {"name": brand}
+        
+        if appliance_type:
+            brand_info["url"] = f"{PARTSELECT_BASE_URL}/{brand}-{appliance_title}-Parts.htm"
+            brand_info["appliance_type"] = appliance_type
+        else:
+            brand_info["dishwasher_url"] = f"{PARTSELECT_BASE_URL}/{brand}-Dishwasher-Parts.htm"
+            brand_info["refrigerator_url"] = f"{PARTSELECT_BASE_URL}/{brand}-Refrigerator-Parts.htm"
+        
+        brands_data.append(brand_info)
+    
+    return {
+        "found": True,
+        "count": len(brands_data),
+        "appliance_type": appliance_type or "all",
+        "brands": brands_data
+    }
+
+# The category and brand listings are static, so the responses for the usual arguments are built
+# once at import; the tool functions hand out shallow copies (the per-item dicts are shared, don't mutate them)
+_PART_CATEGORY_RESPONSES = {t: _build_part_categories(t) for t in ("dishwasher", "refrigerator")}
+_BRANDS_RESPONSES = {t: _build_brands(t) for t in (None, "dishwasher", "refrigerator")}
+
+def get_part_categories(appliance_type: str) -> Dict[str, Any]:
     """
     Get available part categories for appliance type
     """
     try:
-        if appliance_type.lower() == "dishwasher":
-            parts = DISHWASHER_PARTS
-        elif appliance_type.lower() == "refrigerator":
-            parts = REFRIGERATOR_PARTS
-        else:
-            return {
-                "found": False,
-                "error": "Invalid appliance type. Use 'dishwasher' or 'refrigerator'"
-            }
-        
-        categories = []
-        for part in parts:
-            categories.append({
-                "name": part,
-                "url": f"{PARTSELECT_BASE_URL}/{appliance_type.title()}-{part.replace(' ', '-')}.htm",
-                "appliance_type": appliance_type
-            })
-        
-        return {
-            "found": True,
-            "appliance_type": appliance_type,
-            "count": len(categories),
-            "categories": categories
-        }
+        response = _PART_CATEGORY_RESPONSES.get(appliance_type)
+        if response is None:
+            return _build_part_categories(appliance_type)
+        return {**response, "categories": list(response["categories"])}
         
     except Exception as e:
-        logger.error(f"Error getting part categories: {str(e)}")
+        logger.error("Error getting part categories: %s", e)
         return {
             "found": False,
             "error": str(e)
         }
 
-async def get_brands(appliance_type: str = None) -> Dict[str, Any]:
+def get_brands(appliance_type: str = None) -> Dict[str, Any]:
     """
     Get available brands, optionally filtered by appliance type
     """
     try:
-        brands_data = []
-        for brand in APPLIANCE_BRANDS:
-            brand_info = {"name": brand}
-            
-            if appliance_type:
-                brand_info["url"] = f"{PARTSELECT_BASE_URL}/{brand}-{appliance_type.title()}-Parts.htm"
-                brand_info["appliance_type"] = appliance_type
-            else:
-                brand_info["dishwasher_url"] = f"{PARTSELECT_BASE_URL}/{brand}-Dishwasher-Parts.htm"
-                brand_info["refrigerator_url"] = f"{PARTSELECT_BASE_URL}/{brand}-Refrigerator-Parts.htm"
-            
-            brands_data.append(brand_info)
-        
-        return {
-            "found": True,
-            "count": len(brands_data),
-            "appliance_type": appliance_type or "all",
-            "brands": brands_data
-        }
+        response = _BRANDS_RESPONSES.get(appliance_type)
+        if response is None:
+            return _build_brands(appliance_type)
+        return {**response, "brands": list(response["brands"])}
         
     except Exception as e:
-        logger.error(f"Error getting brands: {str(e)}")
+        logger.error("Error getting brands: %s", e)
         return {
             "found": False,
             "error": str(e)
-        } 
\ No newline at end of file
+        }
@@ -0,0 +1,67 @@
+"""
+Response Cache for PartSelect agents
+In-process LRU cache with a TTL, keyed by a digest of everything that shapes an LLM answer
+"""
+
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+def normalize_prompt(text: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different phrasings share a cache key"""
+    return " ".join(_PUNCTUATION_RE.sub(" ", text.casefold()).split())
+
+def make_cache_key(*parts: Any) -> str:
+    """Build a stable digest from prompt parts (strings are hashed as-is, anything else as sorted JSON)"""
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if not isinstance(part, str):
+            part = json.dumps(part, sort_keys=True, default=str)
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\x00")  # Separator so ("ab", "c") and ("a", "bc") differ
+    return hasher.hexdigest()
+
+class ResponseCache:
+    """Bounded LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key`, evicting the least recently used entry when full"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,100 @@
+"""
+Semantic Cache for PartSelect agents
+Reuses answers for paraphrased questions by comparing prompt embeddings against recent answers
+"""
+
+import logging
+import re
+import time
+from typing import Any, List, Optional
+
+import numpy as np
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# Part/model numbers (alphanumeric tokens containing a digit). Questions that differ only in one of
+# these embed almost identically but need different answers, so they are never matched semantically
+_IDENTIFIER_RE = re.compile(r"\b(?=[A-Za-z0-9]*\d)[A-Za-z0-9]{5,15}\b")
+
+class SemanticCache:
+    """
+    Bounded cache of answers keyed by prompt embedding.
+
+    A lookup hits when the cosine similarity between the query embedding and a stored
+    embedding is at least `threshold`. Entries expire after `ttl` seconds, and once `maxsize`
+    entries are held each new one overwrites the oldest in a preallocated ring buffer.
+    Embeddings come from `client`, which must point at a provider with an embeddings
+    endpoint (e.g. OpenAI).
+    """
+
+    def __init__(self,
+                 client: AsyncOpenAI,
+                 embedding_model: str = "text-embedding-3-small",
+                 threshold: float = 0.93,
+                 maxsize: int = 2000,
+                 ttl: float = 3600.0):
+        self.client = client
+        self.embedding_model = embedding_model
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._vectors: Optional[np.ndarray] = None  # (maxsize, dim) unit-length embeddings, allocated on first set
+        self._values: List[Any] = [None] * maxsize
+        self._expires = np.zeros(maxsize)  # Monotonic expiry per slot; 0 marks an empty slot
+        self._next = 0  # Slot the next entry is written to (the oldest once the buffer is full)
+        self._count = 0  # Slots filled so far
+
+    @staticmethod
+    def accepts(text: str) -> bool:
+        """Whether a question may be matched semantically (it names no part or model number)"""
+        return _IDENTIFIER_RE.search(text) is None
+
+    async def embed(self, text: str) -> Optional[np.ndarray]:
+        """Return the unit-length embedding of `text`, or None if the embeddings call fails"""
+        try:
+            response = await self.client.embeddings.create(model=self.embedding_model, input=text)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {str(e)}")
+            return None
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def get(self, vector: np.ndarray) -> Optional[Any]:
+        """Return the value stored for the most similar live embedding, if it clears the threshold"""
+        if not self._count:
+            self.misses += 1
+            return None
+
+        similarities = self._vectors[:self._count] @ vector
+        similarities[self._expires[:self._count] <= time.monotonic()] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return self._values[best]
+
+    def set(self, vector: np.ndarray, value: Any) -> None:
+        """Store `value` under `vector`, overwriting the oldest entry when full"""
+        if self._vectors is None:
+            self._vectors = np.empty((self.maxsize, vector.shape[0]), dtype=np.float32)
+        slot = self._next
+        self._vectors[slot] = vector
+        self._values[slot] = value
+        self._expires[slot] = time.monotonic() + self.ttl
+        self._next = (slot + 1) % self.maxsize
+        self._count = max(self._count, slot + 1)
+
+    def clear(self) -> None:
+        self._values = [None] * self.maxsize
+        self._expires[:] = 0
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._expires[:self._count] > time.monotonic()))
@@ -3,10 +3,34 @@ Structured Outputs for PartSelect Multi-Agent System
 Using Pydantic models for guaranteed schema adherence
 """
 
+from dataclasses import dataclass, field
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Dict, Any, Literal
 from enum import Enum
 
+class StructuredModel(BaseModel):
+    """
+    Base for every structured output model.
+
+    Model fields such as `model_number` are part of the domain, so pydantic's `model_` namespace
+    protection is turned off for all of them.
+    """
+    model_config = ConfigDict(protected_namespaces=())
+
+    @classmethod
+    def trusted(cls, **data: Any):
+        """
+        Build an instance from values the caller computed itself, skipping validation.
+
+        Values must already have their field types (enum members, model instances); LLM output and
+        tool input go through normal construction or model_validate instead. Models that define
+        validators are always validated.
+        """
+        decorators = cls.__pydantic_decorators__
+        if decorators.field_validators or decorators.model_validators:
+            return cls(**data)
+        return cls.model_construct(**data)
+
 class ApplianceType(str, Enum):
     """Supported appliance types"""
     REFRIGERATOR = "refrigerator"
@@ -40,7 +64,7 @@ class ConfidenceLevel(str, Enum):
 
 # === ROUTING/TRIAGING MODELS ===
 
-class QueryClassification(BaseModel):
+class QueryClassification(StructuredModel):
     """Classification result for incoming user queries"""
     query_type: QueryType = Field(description="The primary type of query")
     appliance_type: ApplianceType = Field(description="Target appliance type")
@@ -53,7 +77,11 @@ class QueryClassification(BaseModel):
     )
     reasoning: str = Field(description="Explanation for the classification")
 
-class AgentRouting(BaseModel):
+class QueryClassificationBatch(StructuredModel):
+    """Classifications of several queries returned by one LLM call"""
+    classifications: List[QueryClassification] = Field(default_factory=list, description="Classifications in query order")
+
+class AgentRouting(StructuredModel):
     """Routing decision for agent selection"""
     primary_agent: str = Field(description="Primary agent to handle the query")
     secondary_agents: List[str] = Field(
@@ -68,10 +96,8 @@ class AgentRouting(BaseModel):
 
 # === PRODUCT SEARCH MODELS ===
 
-class PartSearchCriteria(BaseModel):
+class PartSearchCriteria(StructuredModel):
     """Criteria for searching parts"""
-    model_config = ConfigDict(protected_namespaces=())
-    
     search_query: str = Field(description="Main search query")
     appliance_type: ApplianceType = Field(description="Type of appliance")
     brand: Optional[str] = Field(None, description="Specific brand if mentioned")
@@ -79,20 +105,21 @@ class PartSearchCriteria(BaseModel):
     part_category: Optional[str] = Field(None, description="Specific part category")
     price_range: Optional[Dict[str, float]] = Field(None, description="Price range filter")
 
-class PartInfo(BaseModel):
-    """Information about a single part"""
-    part_number: str = Field(description="Part number")
-    name: str = Field(description="Part name")
-    description: str = Field(description="Part description")
-    price: float = Field(description="Part price")
-    brand: str = Field(description="Brand name")
-    appliance_type: ApplianceType = Field(description="Compatible appliance type")
-    in_stock: bool = Field(description="Stock availability")
-    image_url: Optional[str] = Field(None, description="Product image URL")
-    partselect_url: Optional[str] = Field(None, description="PartSelect page URL")
-    oem_compatible: bool = Field(default=True, description="OEM compatibility")
-
-class PartSearchResult(BaseModel):
+@dataclass(slots=True, frozen=True)
+class PartInfo:
+    """Information about a single part (internal only: built per search row, so no validation)"""
+    part_number: str
+    name: str
+    description: str
+    price: float
+    brand: str
+    appliance_type: ApplianceType  # Compatible appliance type
+    in_stock: bool  # Stock availability
+    image_url: Optional[str] = None  # Product image URL
+    partselect_url: Optional[str] = None  # PartSelect page URL
+    oem_compatible: bool = True
+
+class PartSearchResult(StructuredModel):
     """Result of part search operation"""
     found: bool = Field(description="Whether parts were found")
     count: int = Field(description="Number of parts found")
@@ -109,10 +136,8 @@ class PartSearchResult(BaseModel):
 
 # === MODEL LOOKUP MODELS ===
 
-class ModelValidation(BaseModel):
+class ModelValidation(StructuredModel):
     """Model number validation result"""
-    model_config = ConfigDict(protected_namespaces=())
-    
     is_valid: bool = Field(description="Whether model number is valid")
     model_number: str = Field(description="Validated model number")
     appliance_type: ApplianceType = Field(description="Detected appliance type")
@@ -124,10 +149,8 @@ class ModelValidation(BaseModel):
         description="Notes about validation"
     )
 
-class PopularModel(BaseModel):
+class PopularModel(StructuredModel):
     """Information about a popular model"""
-    model_config = ConfigDict(protected_namespaces=())
-    
     model_number: str = Field(description="Model number")
     appliance_type: ApplianceType = Field(description="Appliance type")
     brand: Optional[str] = Field(None, description="Brand name")
@@ -135,10 +158,8 @@ class PopularModel(BaseModel):
     partselect_url: str = Field(description="PartSelect page URL")
     popularity_rank: Optional[int] = Field(None, description="Popularity ranking")
 
-class ModelLookupResult(BaseModel):
+class ModelLookupResult(StructuredModel):
     """Result of model lookup operation"""
-    model_config = ConfigDict(protected_namespaces=())
-    
     found: bool = Field(description="Whether model was found")
     model_info: Optional[ModelValidation] = Field(None, description="Model information")
     similar_models: List[PopularModel] = Field(
@@ -152,10 +173,8 @@ class ModelLookupResult(BaseModel):
 
 # === COMPATIBILITY MODELS ===
 
-class CompatibilityCheck(BaseModel):
+class CompatibilityCheck(StructuredModel):
     """Part compatibility check"""
-    model_config = ConfigDict(protected_namespaces=())
-    
     part_number: str = Field(description="Part number to check")
     model_number: str = Field(description="Model to check against")
     is_compatible: bool = Field(description="Compatibility result")
@@ -171,23 +190,18 @@ class CompatibilityCheck(BaseModel):
 
 # === INSTALLATION GUIDE MODELS ===
 
-class InstallationStep(BaseModel):
-    """Single installation step"""
-    step_number: int = Field(description="Step sequence number")
-    title: str = Field(description="Step title")
-    description: str = Field(description="Detailed step description")
-    tools_needed: List[str] = Field(
-        default_factory=list,
-        description="Tools needed for this step"
-    )
-    safety_warnings: List[str] = Field(
-        default_factory=list,
-        description="Safety warnings for this step"
-    )
-    estimated_time: Optional[str] = Field(None, description="Estimated time for step")
-    difficulty: Optional[str] = Field(None, description="Difficulty level")
-
-class InstallationGuide(BaseModel):
+@dataclass(slots=True, frozen=True)
+class InstallationStep:
+    """Single installation step (internal only)"""
+    step_number: int  # Step sequence number
+    title: str
+    description: str  # Detailed step description
+    tools_needed: List[str] = field(default_factory=list)
+    safety_warnings: List[str] = field(default_factory=list)
+    estimated_time: Optional[str] = None
+    difficulty: Optional[str] = None
+
+class InstallationGuide(StructuredModel):
     """Complete installation guide"""
     part_number: str = Field(description="Part number")
     part_name: str = Field(description="Part name")
@@ -213,19 +227,17 @@ class InstallationGuide(BaseModel):
 
 # === TROUBLESHOOTING MODELS ===
 
-class TroubleshootingStep(BaseModel):
-    """Single troubleshooting step"""
-    step_number: int = Field(description="Step sequence number")
-    action: str = Field(description="Action to take")
-    expected_result: str = Field(description="What should happen")
-    if_successful: Optional[str] = Field(None, description="Next step if successful")
-    if_unsuccessful: Optional[str] = Field(None, description="Next step if unsuccessful")
-    safety_notes: List[str] = Field(
-        default_factory=list,
-        description="Safety considerations"
-    )
-
-class TroubleshootingGuide(BaseModel):
+@dataclass(slots=True, frozen=True)
+class TroubleshootingStep:
+    """Single troubleshooting step (internal only)"""
+    step_number: int  # Step sequence number
+    action: str  # Action to take
+    expected_result: str  # What should happen
+    if_successful: Optional[str] = None  # Next step if successful
+    if_unsuccessful: Optional[str] = None  # Next step if unsuccessful
+    safety_notes: List[str] = field(default_factory=list)
+
+class TroubleshootingGuide(StructuredModel):
     """Complete troubleshooting guide"""
     issue_description: str = Field(description="Description of the issue")
     appliance_type: ApplianceType = Field(description="Appliance type")
@@ -249,15 +261,16 @@ class TroubleshootingGuide(BaseModel):
 
 # === WEB SEARCH MODELS ===
 
-class WebSearchResult(BaseModel):
-    """Single web search result"""
-    title: str = Field(description="Page title")
-    url: str = Field(description="Page URL")
-    snippet: str = Field(description="Page snippet/description")
-    result_type: str = Field(description="Type of result (model, part, brand, etc.)")
-    relevance_score: Optional[float] = Field(None, description="Relevance score")
+@dataclass(slots=True, frozen=True)
+class WebSearchResult:
+    """Single web search result (internal only)"""
+    title: str  # Page title
+    url: str
+    snippet: str  # Page snippet/description
+    result_type: str  # Type of result (model, part, brand, etc.)
+    relevance_score: Optional[float] = None
 
-class WebSearchResults(BaseModel):
+class WebSearchResults(StructuredModel):
     """Web search results collection"""
     query: str = Field(description="Original search query")
     found: bool = Field(description="Whether results were found")
@@ -270,7 +283,7 @@ class WebSearchResults(BaseModel):
 
 # === RESPONSE MODELS ===
 
-class AgentResponse(BaseModel):
+class AgentResponse(StructuredModel):
     """Standard response from any agent"""
     agent_name: str = Field(description="Name of the responding agent")
     success: bool = Field(description="Whether the operation was successful")
@@ -294,7 +307,7 @@ class AgentResponse(BaseModel):
         description="Suggested follow-up questions"
     )
 
-class FinalResponse(BaseModel):
+class FinalResponse(StructuredModel):
     """Final consolidated response to user"""
     message: str = Field(description="Main response message")
     response_type: QueryType = Field(description="Type of response")
@@ -317,13 +330,13 @@ class FinalResponse(BaseModel):
 
 # === TOOL CALLING MODELS ===
 
-class ToolCall(BaseModel):
+class ToolCall(StructuredModel):
     """Represents a tool call with structured parameters"""
     tool_name: str = Field(description="Name of the tool to call")
     parameters: Dict[str, Any] = Field(description="Tool parameters")
     reason: str = Field(description="Reason for calling this tool")
 
-class ToolResult(BaseModel):
+class ToolResult(StructuredModel):
     """Result from a tool execution"""
     tool_name: str = Field(description="Name of the executed tool")
     success: bool = Field(description="Whether tool execution was successful")
@@ -333,7 +346,7 @@ class ToolResult(BaseModel):
 
 # === MULTI-AGENT COORDINATION MODELS ===
 
-class AgentHandoff(BaseModel):
+class AgentHandoff(StructuredModel):
     """Represents handoff between agents"""
     from_agent: str = Field(description="Source agent")
     to_agent: str = Field(description="Target agent")
@@ -341,7 +354,7 @@ class AgentHandoff(BaseModel):
     reason: str = Field(description="Reason for handoff")
     priority: str = Field(default="normal", description="Handoff priority")
 
-class ParallelExecution(BaseModel):
+class ParallelExecution(StructuredModel):
     """Configuration for parallel agent execution"""
     agents: List[str] = Field(description="Agents to run in parallel")
     shared_context: Dict[str, Any] = Field(
@@ -352,4 +365,28 @@ class ParallelExecution(BaseModel):
         default="merge",
         description="How to consolidate results"
     )
-    timeout_seconds: int = Field(default=30, description="Execution timeout") 
\ No newline at end of file
+    timeout_seconds: int = Field(default=30, description="Execution timeout")
+
+# === GUARDRAIL MODELS ===
+
+class GuardrailEvaluation(StructuredModel):
+    """Hallucination evaluation returned by the guardrail model"""
+    is_hallucination: bool = Field(default=False, description="Whether the response contains a hallucination")
+    confidence_score: float = Field(default=0.0, ge=0.0, le=1.0, description="Confidence that it is a hallucination")
+    reasons: List[str] = Field(default_factory=list, description="Reasons for the assessment")
+    specific_issues: Dict[str, Any] = Field(default_factory=dict, description="Assessment per issue category")
+    severity: Literal["low", "medium", "high"] = Field(default="low", description="Severity of any issues found")
+    recommendation: Literal["allow", "warn", "block"] = Field(default="allow", description="Recommended action")
+
+class GuardrailItemEvaluation(GuardrailEvaluation):
+    """One entry of a batched guardrail evaluation"""
+    item: Optional[int] = Field(None, description="Index of the evaluated item")
+
+class GuardrailBatchEvaluation(StructuredModel):
+    """Batched guardrail evaluation covering several responses"""
+    evaluations: List[GuardrailItemEvaluation] = Field(default_factory=list, description="Evaluations in item order")
+
+class GuardrailTriage(StructuredModel):
+    """Fast first-pass verdict used to decide whether a full evaluation is needed"""
+    suspicious: bool = Field(default=True, description="Whether the response may contain a hallucination")
+    confidence: float = Field(default=1.0, ge=0.0, le=1.0, description="Confidence that the response is problematic")
@@ -1,6 +1,9 @@
-from typing import Dict, List, Any, Optional
-import json
+from typing import Dict, List, Any, Optional, Tuple
+import orjson
+from functools import lru_cache
+from operator import itemgetter
 import os
+import re
 from pathlib import Path
 import logging
 logging.basicConfig(level=logging.INFO)
@@ -12,23 +15,93 @@ def load_mock_data():
     try:
 
         data_path = Path(__file__).parent.parent / "data" / "parts_database.json"
-        with open(data_path, 'r') as f:
-            return json.load(f)
+        with open(data_path, 'rb') as f:
+            return orjson.loads(f.read())
     except Exception as e:
         logger.error(f"Error loading mock data: {str(e)}")
         return None
 
+# Words that only show up in made-up part numbers (matched against the uppercased number)
+_FAKE_RE = re.compile(
+    r"MAGIC|UNICORN|FAKE|TEST|QUANTUM|SPACE|ALIEN|DRAGON|WIZARD|ROBOT|CYBER|MATRIX|INFINITY"
+)
+
+# Installation instructions that must never be shown
+_DANGER_RE = re.compile(
+    r"while running|with power on|live wire|bare hands|metal fork|without unplugging|skip safety",
+    re.IGNORECASE
+)
+
 # Mock database
 PARTS_DB = None
 
+# Lookup structures derived from PARTS_DB when it loads (see _index_parts_db):
+# uppercased part number -> part (first occurrence wins, as the old linear scans did)
+_PARTS_BY_NUMBER: Dict[str, Dict[str, Any]] = {}
+# uppercased part number -> uppercased compatible models
+_COMPATIBLE_MODELS: Dict[str, frozenset] = {}
+# Searchable parts as (part, lowercased part number/name/description/compatible models), all of
+# them and per lowercased appliance type; parts with invalid numbers or prices are left out
+_SEARCH_ROWS: List[Tuple[Dict[str, Any], Tuple[str, ...]]] = []
+_SEARCH_ROWS_BY_APPLIANCE: Dict[str, List[Tuple[Dict[str, Any], Tuple[str, ...]]]] = {}
+# appliance type -> (lowercased keywords, guide) per troubleshooting guide, in database order
+_TROUBLESHOOTING_GUIDES: Dict[str, List[Tuple[Tuple[str, ...], Dict[str, Any]]]] = {}
+
 def get_parts_db():
     global PARTS_DB
     if PARTS_DB is None:
-        PARTS_DB = load_mock_data()
+        db = load_mock_data()
+        if db is not None:
+            _index_parts_db(db)
+        PARTS_DB = db
     if PARTS_DB is None:
         raise RuntimeError("Parts database could not be loaded. Check data/parts_database.json file exists and is valid JSON.")
     return PARTS_DB
 
+def _index_parts_db(db: Dict[str, Any]) -> None:
+    """Build the part-number and search indexes for a freshly loaded database"""
+    by_number: Dict[str, Dict[str, Any]] = {}
+    compatible: Dict[str, frozenset] = {}
+    rows: List[Tuple[Dict[str, Any], Tuple[str, ...]]] = []
+    rows_by_appliance: Dict[str, List[Tuple[Dict[str, Any], Tuple[str, ...]]]] = {}
+    
+    for part in db.get("parts", []):
+        part_number = part.get("part_number", "")
+        key = part_number.upper()
+        if key not in by_number:
+            by_number[key] = part
+            compatible[key] = frozenset(m.upper() for m in part.get("compatible_models", []))
+        
+        # Validate part data once here rather than on every search hit
+        if not validate_part_number(part_number):
+            logger.warning(f"Excluding part with invalid part number from search: {part_number}")
+            continue
+        if not validate_price(part.get("price", 0)):
+            logger.warning(f"Excluding part with invalid price from search: {part.get('price', 0)} for part {part_number}")
+            continue
+        
+        fields = (
+            part_number.lower(),
+            part.get("name", "").lower(),
+            part.get("description", "").lower(),
+            *(model.lower() for model in part.get("compatible_models", []))
+        )
+        row = (part, fields)
+        rows.append(row)
+        rows_by_appliance.setdefault(part.get("appliance_type", "").lower(), []).append(row)
+    
+    troubleshooting = {
+        appliance_type: [(tuple(k.lower() for k in guide.get("keywords", [])), guide) for guide in guides]
+        for appliance_type, guides in db.get("troubleshooting_guides", {}).items()
+    }
+    
+    global _PARTS_BY_NUMBER, _COMPATIBLE_MODELS, _SEARCH_ROWS, _SEARCH_ROWS_BY_APPLIANCE, _TROUBLESHOOTING_GUIDES
+    _PARTS_BY_NUMBER, _COMPATIBLE_MODELS = by_number, compatible
+    _SEARCH_ROWS, _SEARCH_ROWS_BY_APPLIANCE = rows, rows_by_appliance
+    _TROUBLESHOOTING_GUIDES = troubleshooting
+    for cached in (_search_parts_impl, _installation_steps_impl, _troubleshooting_impl):
+        cached.cache_clear()
+
 def validate_part_number(part_number: str) -> bool:
     """Basic validation for part numbers to prevent obviously fake ones"""
     if not part_number or not isinstance(part_number, str):
@@ -38,14 +111,8 @@ def validate_part_number(part_number: str) -> bool:
     part_number = part_number.strip().upper()
     
     # Check for obviously fake patterns
-    fake_patterns = [
-        "MAGIC", "UNICORN", "FAKE", "TEST", "QUANTUM", "SPACE", "ALIEN",
-        "DRAGON", "WIZARD", "ROBOT", "CYBER", "MATRIX", "INFINITY"
-    ]
-    
-    for pattern in fake_patterns:
-        if pattern in part_number:
-            return False
+    if _FAKE_RE.search(part_number):
+        return False
     
     # Basic format check - should be 4-15 alphanumeric characters
     if not (4 <= len(part_number) <= 15 and part_number.replace("-", "").isalnum()):
@@ -61,7 +128,64 @@ def validate_price(price: float) -> bool:
     # Reasonable price range for appliance parts ($1 - $2000)
     return 1.0 <= price <= 2000.0
 
-async def search_parts(query: str, appliance_type: str = "both") -> Dict[str, Any]:
+# The tool lookups below are pure functions of their normalized arguments and the loaded database,
+# so their results are memoized; _index_parts_db clears these caches when the database is (re)loaded.
+# The public tools build a fresh top-level dict per call, but nested values (compatible_models,
+# specifications, causes, solutions, ...) are the shared database objects; the agent's tool cache
+# also shares whole results across turns, so callers must never mutate what a tool returns.
+
+@lru_cache(maxsize=1024)
+def _search_parts_impl(query_lower: str, appliance_type: str) -> Tuple[Dict[str, Any], ...]:
+    """Parts matching a lowercased, stripped query on part number, name, description or any compatible model"""
+    rows = _SEARCH_ROWS if appliance_type == "both" else _SEARCH_ROWS_BY_APPLIANCE.get(appliance_type.lower(), [])
+    return tuple(part for part, fields in rows if any(query_lower in field for field in fields))
+
+@lru_cache(maxsize=1024)
+def _installation_steps_impl(part_key: str) -> Tuple[Any, ...]:
+    """Installation steps for a known (uppercased) part number, with dangerous instructions removed"""
+    db = get_parts_db()
+    part = _PARTS_BY_NUMBER[part_key]
+    
+    # Get installation guide from database or use default
+    installation = part.get("installation_guide", db["default_guides"]["installation"].get(part["category"], []))
+    
+    if not installation:
+    # Try to get default guide by category
+        category = part.get("category", "general")
+        installation = db.get("default_guides", {}).get("installation", {}).get(category, [])
+        
+        # Final fallback
+        if not installation:
+            installation = [
+                "Refer to your owner's manual for specific instructions",
+                "Ensure power is disconnected before beginning installation",
+                "Follow all manufacturer safety guidelines"
+            ]
+
+    # Add safety checks to installation steps
+    safe_installation = []
+    for step in installation:
+        if isinstance(step, str):
+            # Remove dangerous instructions
+            if _DANGER_RE.search(step):
+                logger.warning(f"Skipping potentially dangerous installation step: {step}")
+                continue
+        safe_installation.append(step)
+    
+    return tuple(safe_installation)
+
+@lru_cache(maxsize=1024)
+def _troubleshooting_impl(issue_lower: str, appliance_type: str) -> Optional[Dict[str, Any]]:
+    """The troubleshooting guide whose keywords best match a lowercased issue, if any match"""
+    # Score every guide once and keep the first with the most keyword matches
+    scored = (
+        (sum(1 for keyword in keywords if keyword in issue_lower), guide)
+        for keywords, guide in _TROUBLESHOOTING_GUIDES.get(appliance_type, [])
+    )
+    matches, guide = max(scored, key=itemgetter(0), default=(0, None))
+    return guide if matches else None
+
+def search_parts(query: str, appliance_type: str = "both") -> Dict[str, Any]:
     """Search for parts by keyword, model, or part number"""
     try:
 
@@ -75,49 +199,25 @@ async def search_parts(query: str, appliance_type: str = "both") -> Dict[str, An
         
         query_lower = query.lower().strip()
 
-        db = get_parts_db()
-        results = []
-        
-        for part in db["parts"]:
-            # Filter by appliance type
-            # Filter by appliance type
-            if appliance_type != "both" and part.get("appliance_type", "").lower() != appliance_type.lower():
-                continue
-            
-            # Enhanced matching - check for exact part number first
-            if (query_lower == part.get("part_number", "").lower() or
-                query_lower in part.get("part_number", "").lower() or
-                query_lower in part.get("name", "").lower() or
-                query_lower in part.get("description", "").lower() or
-                any(query_lower in model.lower() for model in part.get("compatible_models", []))):
-                
-                # Validate part data before including in results
-                part_number = part.get("part_number", "")
-                price = part.get("price", 0)
-                
-                # Skip parts with invalid data
-                if not validate_part_number(part_number):
-                    logger.warning(f"Skipping part with invalid part number: {part_number}")
-                    continue
-                
-                if not validate_price(price):
-                    logger.warning(f"Skipping part with invalid price: {price} for part {part_number}")
-                    continue
-                
-                results.append({
-                    "part_number": part["part_number"],
-                    "name": part["name"],
-                    "description": part["description"],
-                    "price": part["price"],
-                    "appliance_type": part["appliance_type"],
-                    "image_url": part.get("image_url", ""),
-                    "in_stock": part.get("in_stock", True)
-                })
+        get_parts_db()
+        matches = _search_parts_impl(query_lower, appliance_type)
+        results = [
+            {
+                "part_number": part["part_number"],
+                "name": part["name"],
+                "description": part["description"],
+                "price": part["price"],
+                "appliance_type": part["appliance_type"],
+                "image_url": part.get("image_url", ""),
+                "in_stock": part.get("in_stock", True)
+            }
+            for part in matches[:10]  # Limit to 10 results
+        ]
         
         return {
-            "found": len(results) > 0,
-            "count": len(results),
-            "results": results[:10]  # Limit to 10 results
+            "found": len(matches) > 0,
+            "count": len(matches),
+            "results": results
         }
     except Exception as e:
         logger.error(f"Error searching parts: {str(e)}")
@@ -129,10 +229,10 @@ async def search_parts(query: str, appliance_type: str = "both") -> Dict[str, An
         }
 
 
-async def check_compatibility(part_number: str, model_number: str) -> Dict[str, Any]:
+def check_compatibility(part_number: str, model_number: str) -> Dict[str, Any]:
     """Check if a part is compatible with a specific model"""
     try:
-        db = get_parts_db()
+        get_parts_db()
 
         # Validate inputs
         if not part_number or not model_number:
@@ -153,11 +253,7 @@ async def check_compatibility(part_number: str, model_number: str) -> Dict[str,
             }
         
         # Find the part
-        part = None
-        for p in db["parts"]:
-            if p["part_number"].upper() == part_number.upper():
-                part = p
-                break
+        part = _PARTS_BY_NUMBER.get(part_number.upper())
         
         if not part:
             return {
@@ -168,8 +264,7 @@ async def check_compatibility(part_number: str, model_number: str) -> Dict[str,
             }
         
         # Check compatibility
-        model_upper = model_number.upper()
-        compatible = any(model_upper == m.upper() for m in part["compatible_models"])
+        compatible = model_number.upper() in _COMPATIBLE_MODELS[part_number.upper()]
         
         return {
             "compatible": compatible,
@@ -188,9 +283,9 @@ async def check_compatibility(part_number: str, model_number: str) -> Dict[str,
             "model_number": model_number
         }
 
-async def get_installation_guide(part_number: str) -> Dict[str, Any]:
+def get_installation_guide(part_number: str) -> Dict[str, Any]:
     """Get installation instructions for a part"""
-    db = get_parts_db()
+    get_parts_db()
     
         # Validate input
     if not part_number:
@@ -202,11 +297,7 @@ async def get_installation_guide(part_number: str) -> Dict[str, Any]:
     
 
     # Find the part
-    part = None
-    for p in db["parts"]:
-        if p["part_number"].upper() == part_number.upper():
-            part = p
-            break
+    part = _PARTS_BY_NUMBER.get(part_number.upper())
     
     if not part:
         return {
@@ -215,35 +306,7 @@ async def get_installation_guide(part_number: str) -> Dict[str, Any]:
             "error": "Part not found"
         }
     
-    # Get installation guide from database or use default
-    installation = part.get("installation_guide", db["default_guides"]["installation"].get(part["category"], []))
-    
-    if not installation:
-    # Try to get default guide by category
-        category = part.get("category", "general")
-        installation = db.get("default_guides", {}).get("installation", {}).get(category, [])
-        
-        # Final fallback
-        if not installation:
-            installation = [
-                "Refer to your owner's manual for specific instructions",
-                "Ensure power is disconnected before beginning installation",
-                "Follow all manufacturer safety guidelines"
-            ]
-
-    # Add safety checks to installation steps
-    safe_installation = []
-    for step in installation:
-        if isinstance(step, str):
-            # Remove dangerous instructions
-            step_lower = step.lower()
-            if any(danger in step_lower for danger in [
-                "while running", "with power on", "live wire", "bare hands", 
-                "metal fork", "without unplugging", "skip safety"
-            ]):
-                logger.warning(f"Skipping potentially dangerous installation step: {step}")
-                continue
-        safe_installation.append(step)
+    safe_installation = list(_installation_steps_impl(part_number.upper()))
     
     # Ensure safety warning is always present
     safety_warning = "Always unplug the appliance and turn off power at the circuit breaker before beginning any repair."
@@ -260,9 +323,9 @@ async def get_installation_guide(part_number: str) -> Dict[str, Any]:
             "video_url": part.get("installation_video_url", "")
         }
 
-async def get_troubleshooting_guide(issue: str, appliance_type: str) -> Dict[str, Any]:
+def get_troubleshooting_guide(issue: str, appliance_type: str) -> Dict[str, Any]:
     """Get troubleshooting guide for common issues"""
-    db = get_parts_db()
+    get_parts_db()
     
 
         # Validate inputs
@@ -273,24 +336,10 @@ async def get_troubleshooting_guide(issue: str, appliance_type: str) -> Dict[str
             "appliance_type": appliance_type,
             "error": "Both issue and appliance type are required"
         }
-    # Find relevant troubleshooting guides
-    guides = db["troubleshooting_guides"].get(appliance_type, [])
-    issue_lower = issue.lower()
+    # Find the most relevant troubleshooting guide
+    guide = _troubleshooting_impl(issue.lower(), appliance_type)
     
-    relevant_guides = []
-    for guide in guides:
-        # More flexible matching
-        keywords = guide.get("keywords", [])
-        if any(keyword.lower() in issue_lower for keyword in keywords):
-            relevant_guides.append(guide)
-    
-    # Sort by number of matching keywords (better matches first)
-    relevant_guides.sort(
-        key=lambda g: sum(1 for k in g.get("keywords", []) if k.lower() in issue_lower),
-        reverse=True
-    )
-    
-    if not relevant_guides:
+    if guide is None:
         # Return generic troubleshooting
         return {
             "found": False,
@@ -306,7 +355,6 @@ async def get_troubleshooting_guide(issue: str, appliance_type: str) -> Dict[str
         }
     
     # Return the most relevant guide
-    guide = relevant_guides[0]
     return {
         "found": True,
         "issue": guide["issue"],
@@ -318,9 +366,9 @@ async def get_troubleshooting_guide(issue: str, appliance_type: str) -> Dict[str
         "when_to_call_professional": guide.get("professional_help", "If problem persists after trying these solutions")
     }
 
-async def get_part_details(part_number: str) -> Dict[str, Any]:
+def get_part_details(part_number: str) -> Dict[str, Any]:
     """Get detailed information about a specific part"""
-    db = get_parts_db()
+    get_parts_db()
     
     # Validate input
     if not part_number:
@@ -331,11 +379,7 @@ async def get_part_details(part_number: str) -> Dict[str, Any]:
         }
     
     # Find the part
-    part = None
-    for p in db.get("parts", []):
-        if p.get("part_number", "").upper() == part_number.upper():
-            part = p
-            break
+    part = _PARTS_BY_NUMBER.get(part_number.upper())
     
     if not part:
         return {
@@ -111,9 +111,12 @@ Fine-tuning (overrides preset):
 - GUARDRAIL_WARN_MEDIUM: true/false - Warn on medium-confidence issues  
 - GUARDRAIL_LOG_ALL: true/false - Log all evaluations for monitoring
 - GUARDRAIL_TIMEOUT: 1.0-30.0 (default: 8.0) - Max evaluation time in seconds
+- GUARDRAIL_BATCH_INTERVAL_MS: (default: 0) - Coalesce evaluations arriving within this window into one call (0 disables)
+- GUARDRAIL_PREFILTER: true/false (default: true) - Allow short, tool-backed responses locally without an LLM evaluation
 
 API Settings:
 - DEEPSEEK_GUARDRAIL_MODEL: deepseek-chat (default) - Model for evaluation
+- DEEPSEEK_GUARDRAIL_FAST_MODEL: (default: unset) - Cheaper model that triages responses; the full evaluation only runs on suspicious ones
 - DEEPSEEK_BASE_URL: https://api.deepseek.com (default) - API base URL
 
 Example .env configuration:
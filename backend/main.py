@@ -1,14 +1,17 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
-import json
+import orjson
 import asyncio
 from typing import Dict, List
 import os
 from datetime import datetime
 from dotenv import load_dotenv
 
-from agents.parts_agent import PartsAgent
+from agents.llm_client import close_clients
+from agents.parts_agent import PartsAgent, get_parts_agent
+from agents.tools import get_parts_db
 from models.schemas import ChatMessage, ChatResponse
 
 # Load environment variables
@@ -31,19 +34,19 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
-# Initialize the agent
-parts_agent = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    global parts_agent
-    parts_agent = PartsAgent()
+    # Startup: create the shared agent (endpoints receive it via Depends(get_parts_agent))
+    parts_agent = get_parts_agent()
+    # Load the parts database off the event loop so the first tool call doesn't block on file I/O,
+    # while the LLM connection pool is warmed (TCP + TLS) for the first request
+    await asyncio.gather(asyncio.to_thread(get_parts_db), parts_agent.prewarm())
     yield
     # Shutdown
-    pass
+    await parts_agent.close()
+    await close_clients()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -59,7 +62,7 @@ async def root():
     return {"message": "PartSelect Chat Agent API"}
 
 @app.post("/chat")
-async def chat(message: ChatMessage):
+async def chat(message: ChatMessage, parts_agent: PartsAgent = Depends(get_parts_agent)):
     """Handle chat messages via REST API"""
     try:
         # Add timeout to prevent frontend timeouts
@@ -86,29 +89,56 @@ async def chat(message: ChatMessage):
             error=True
         )
 
+@app.post("/chat/stream")
+async def chat_stream(message: ChatMessage, parts_agent: PartsAgent = Depends(get_parts_agent)):
+    """
+    Stream the agent response as server-sent events: one event per text delta, a tool_call event
+    as each tool is dispatched, and a final guardrail_correction event only if the guardrail
+    blocks or warns on the finished answer
+    """
+    async def event_stream():
+        try:
+            async for event in parts_agent.stream_message_with_review(message.message, message.conversation_id):
+                if event["type"] == "delta":
+                    yield f"data: {orjson.dumps({'delta': event['content']}).decode()}\n\n"
+                else:
+                    yield f"data: {orjson.dumps(event).decode()}\n\n"
+        except Exception as e:
+            print(f"Error in chat stream endpoint: {str(e)}")
+            yield f"data: {orjson.dumps({'error': True, 'message': 'I encountered an error processing your request. Please try again or contact support if the issue persists.'}).decode()}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.websocket("/ws/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: str):
+async def websocket_endpoint(websocket: WebSocket, client_id: str, parts_agent: PartsAgent = Depends(get_parts_agent)):
     """Handle WebSocket connections for real-time chat"""
     await manager.connect(websocket)
     try:
         while True:
             # Receive message from client
             data = await websocket.receive_text()
-            message_data = json.loads(data)
+            message_data = orjson.loads(data)
             
-            # Process message with agent
-            response = await parts_agent.process_message(
+            # Process message with agent; the guardrail review runs after the answer is sent
+            response, review_task = await parts_agent.process_message_with_review(
                 message_data["message"], 
                 client_id
             )
             
             # Send response back to client
-            await manager.send_message(json.dumps(response), websocket)
+            await manager.send_message(orjson.dumps(response).decode(), websocket)
+            
+            # Follow up with a correction frame only if the guardrail blocked or warned
+            if review_task:
+                reviewed = await review_task
+                if reviewed.get("guardrail_blocked") or reviewed.get("guardrail_warning"):
+                    await manager.send_message(orjson.dumps({**reviewed, "type": "guardrail_correction"}).decode(), websocket)
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
         print(f"Client {client_id} disconnected")
 
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+async def health_check(parts_agent: PartsAgent = Depends(get_parts_agent)):
+    return {"status": "healthy", "tool_cache": parts_agent.tool_cache_stats()}
\ No newline at end of file